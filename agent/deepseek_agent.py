@@ -8,10 +8,24 @@ This module provides the three core functions needed by the agent loop:
 
 from __future__ import annotations
 
+import copy
+import hashlib
+import io
+import json
+import mmap
+import os
 import re
+import shutil
 import subprocess
 import tempfile
+import threading
+from collections import OrderedDict, deque
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from itertools import islice
 from pathlib import Path
+from typing import Any, NamedTuple
 
 from agent.types import (
     AgentState,
@@ -50,55 +64,111 @@ logger = get_logger(__name__)
 # HELPER FUNCTIONS
 # =============================================================================
 
+_PUNCT_RE = re.compile(r"['\"`.,;:!?\(\)\[\]\{\}<>]")
+# snake_case, CamelCase and dotted.module identifiers never overlap, so one
+# alternation pass finds the same matches as three separate scans
+_IDENT_RE = re.compile(
+    r'\b(?P<snake>[a-z][a-z0-9]*(?:_[a-z0-9]+)+)\b'
+    r'|\b(?P<camel>[A-Z][a-z]+(?:[A-Z][a-z]+)+)\b'
+    r'|\b(?P<module>[a-z][a-z0-9]*(?:\.[a-z][a-z0-9]*)+)\b'
+)
+_BACKTICK_RE = re.compile(r'`([^`]+)`')
+_CLEAN_TABLE = str.maketrans({"`": "", "*": "", "_": " "})
+
+# Tool-name keywords (tools arrive namespaced, e.g. "sandbox.read_file")
+_SEARCH_KWS = ("grep", "search", "find", "rg")
+_READ_KWS = ("read", "cat", "view")
+_TEST_KWS = ("test", "pytest", "run")
+
+
 def _clean_search_term(term: str) -> str:
     """Clean a search term by removing punctuation and formatting characters."""
     # Remove markdown formatting
-    term = term.replace("`", "").replace("*", "").replace("_", " ").replace("__", " ")
+    term = term.translate(_CLEAN_TABLE)
     # Remove common punctuation
-    term = re.sub(r"['\"`.,;:!?\(\)\[\]\{\}<>]", "", term)
+    term = _PUNCT_RE.sub("", term)
     # Clean up whitespace
     term = term.strip()
     return term
 
 
+def _has_kw(tool: str, keywords: tuple[str, ...]) -> bool:
+    """Check whether any keyword occurs in a tool name."""
+    for kw in keywords:
+        if kw in tool:
+            return True
+    return False
+
+
+def _first_n_lines(text: str, n: int) -> list[str]:
+    """Return the first ``n`` lines of text without splitting the whole string."""
+    lines = []
+    pos = 0
+    for _ in range(n):
+        nxt = text.find("\n", pos)
+        if nxt < 0:
+            lines.append(text[pos:])
+            return lines
+        lines.append(text[pos:nxt])
+        pos = nxt + 1
+    return lines
+
+
 def _extract_code_identifiers(text: str) -> list[str]:
     """Extract likely code identifiers from problem text."""
-    identifiers = []
-    
-    # Find function/method names (word_word pattern)
-    snake_case = re.findall(r'\b([a-z][a-z0-9]*(?:_[a-z0-9]+)+)\b', text)
-    identifiers.extend(snake_case)
-    
-    # Find class names (CamelCase)
-    camel_case = re.findall(r'\b([A-Z][a-z]+(?:[A-Z][a-z]+)+)\b', text)
-    identifiers.extend(camel_case)
-    
-    # Find module paths (word.word.word)
-    module_paths = re.findall(r'\b([a-z][a-z0-9]*(?:\.[a-z][a-z0-9]*)+)\b', text)
-    identifiers.extend(module_paths)
+    # Bucket function/method names (word_word), class names (CamelCase) and
+    # module paths (word.word.word) so they keep their priority order
+    buckets: dict[str, list[str]] = {"snake": [], "camel": [], "module": []}
+    for match in _IDENT_RE.finditer(text):
+        kind = match.lastgroup
+        if kind is not None:
+            buckets[kind].append(match.group(kind))
+    identifiers = buckets["snake"] + buckets["camel"] + buckets["module"]
     
     # Find backtick-wrapped code
-    backtick_code = re.findall(r'`([^`]+)`', text)
+    backtick_code = _BACKTICK_RE.findall(text)
     for code in backtick_code:
         clean = _clean_search_term(code)
         if len(clean) > 3 and clean.replace("_", "").isalnum():
             identifiers.append(clean)
     
     # Remove duplicates while preserving order
-    seen = set()
-    unique = []
-    for ident in identifiers:
-        if ident not in seen and len(ident) > 3:
-            seen.add(ident)
-            unique.append(ident)
-    
-    return unique[:20]  # Limit to 20
+    return [ident for ident in dict.fromkeys(identifiers) if len(ident) > 3][:20]  # Limit to 20
 
 
 # =============================================================================
 # PROPOSE FUNCTION - Uses DeepSeek R1 to generate proposals
 # =============================================================================
 
+# In-process cache of deterministic (temperature=0) responses keyed by prompt digest.
+# Identical prompts recur when the agent loops in a phase with no new context.
+_RESPONSE_CACHE_MAX = 512
+_response_cache: OrderedDict[bytes, dict] = OrderedDict()
+
+
+def _call_model_cached(prompt: str, temperature: float) -> dict:
+    """Call the model, reusing the response for repeated deterministic prompts.
+    
+    The cache holds its own deep copy and every hit returns a fresh one,
+    so a caller that mutates the response cannot corrupt later hits.
+    """
+    if temperature > 0.0:
+        return call_model(prompt, temperature=temperature)
+    
+    key = hashlib.blake2b(prompt.encode("utf-8"), digest_size=16).digest()
+    cached = _response_cache.get(key)
+    if cached is not None:
+        _response_cache.move_to_end(key)
+        logger.debug("DeepSeek response cache hit", prompt_len=len(prompt))
+        return copy.deepcopy(cached)
+    
+    response = call_model(prompt, temperature=temperature)
+    _response_cache[key] = copy.deepcopy(response)
+    if len(_response_cache) > _RESPONSE_CACHE_MAX:
+        _response_cache.popitem(last=False)
+    return response
+
+
 def propose(profile: Profile, state: AgentState) -> Proposal:
     """Generate a proposal using DeepSeek R1."""
     prompt = _build_prompt(profile, state)
@@ -123,7 +193,7 @@ def propose(profile: Profile, state: AgentState) -> Proposal:
     )
     
     try:
-        response = call_model(prompt, temperature=base_temp)
+        response = _call_model_cached(prompt, base_temp)
     except Exception as e:
         logger.error("DeepSeek call failed", error=str(e))
         return _fallback_proposal(state, str(e))
@@ -163,8 +233,7 @@ def _build_prompt(profile: Profile, state: AgentState) -> str:
     parts.append(f"# 🎯 TASK\n{problem}")
     
     # Current phase with detailed instructions - up front so LLM knows what to do
-    parts.append(f"\n# 📋 CURRENT PHASE: {state.phase.value}")
-    parts.append(_get_phase_instruction(state.phase))
+    parts.append(_PHASE_PROMPT_SECTIONS[state.phase])
     
     # For PATCH_CANDIDATES, explicitly show which file to edit
     if state.phase == Phase.PATCH_CANDIDATES:
@@ -186,9 +255,8 @@ def _build_prompt(profile: Profile, state: AgentState) -> str:
                 parts.append(f"\n## ⚠️ SKIP: {fname} (test file - do not edit)")
                 continue
             # Add line numbers to help with diff generation
-            lines = content.split("\n")[:150]  # Limit to 150 lines
-            numbered_lines = [f"{i+1:4}: {line}" for i, line in enumerate(lines)]
-            numbered_content = "\n".join(numbered_lines)
+            lines = _first_n_lines(content, 150)  # Limit to 150 lines
+            numbered_content = "\n".join(f"{i:4}: {line}" for i, line in enumerate(lines, 1))
             parts.append(f"\n## ✅ {fname}\n```\n{numbered_content}\n```")
     
     # Budget status - show urgency
@@ -206,20 +274,17 @@ def _build_prompt(profile: Profile, state: AgentState) -> str:
                 parts.append(f"- {hit.get('file', 'unknown')}: {hit.get('reason', '')}")
     
     # Add history of what was already done (compact)
-    if "action_history" not in state.notes:
-        state.notes["action_history"] = []
-    
-    history = state.notes.get("action_history", [])
+    history = state.notes["action_history"]
     if history:
         parts.append(f"\n# 📜 HISTORY (last {min(len(history), 5)} actions)")
-        for h in history[-5:]:
+        for h in islice(history, max(0, len(history) - 5), None):
             parts.append(f"- {h}")
     
     # Last failures - important for diagnosis
     if state.last_failures:
         parts.append("\n# ❌ LAST TEST FAILURES")
         for f in state.last_failures[:3]:
-            parts.append(f"- {f.nodeid}: {f.message[:100]}")
+            parts.append(f"- {f.nodeid}: {f.short_message}")
     
     # Last gate rejection
     if "last_gate_reject" in state.notes:
@@ -257,10 +322,8 @@ def _build_prompt(profile: Profile, state: AgentState) -> str:
     return "\n".join(parts)
 
 
-def _get_phase_instruction(phase: Phase) -> str:
-    """Get detailed instruction for current phase."""
-    instructions = {
-        Phase.INGEST: """
+_PHASE_INSTRUCTIONS: dict[Phase, str] = {
+    Phase.INGEST: """
 ## PHASE: INGEST - Understand the Problem
 
 Read the problem statement and identify:
@@ -270,7 +333,7 @@ Read the problem statement and identify:
 
 OUTPUT: {"mode": "tool_request", "requests": [{"tool": "sandbox.read_file", "args": {"path": "<most_likely_source_file>"}}], "why": "Reading source to understand current behavior"}
 """,
-        Phase.LOCALIZE: """
+    Phase.LOCALIZE: """
 ## PHASE: LOCALIZE - Find the Bug Location
 
 You've read some code. Now pinpoint the EXACT location of the bug.
@@ -283,7 +346,7 @@ OUTPUT: {"mode": "tool_request", "requests": [{"tool": "sandbox.grep", "args": {
 
 IMPORTANT: Focus on SOURCE files in src/, lib/, or the main package directory. Avoid test/ directories.
 """,
-        Phase.PLAN: """
+    Phase.PLAN: """
 ## PHASE: PLAN - Design the Fix
 
 Based on what you've read, plan the minimal fix:
@@ -296,7 +359,7 @@ If you need more info, read another file. Otherwise, proceed to generate a patch
 
 OUTPUT: Continue reading OR proceed to patch generation
 """,
-        Phase.PATCH_CANDIDATES: """
+    Phase.PATCH_CANDIDATES: """
 ## PHASE: PATCH_CANDIDATES - Generate the Fix
 
 ⚠️ YOU MUST OUTPUT A PATCH NOW. No more reading files.
@@ -328,7 +391,7 @@ DIFF FORMAT:
 EXAMPLE (fixing a comparison bug):
 {"mode": "patch", "diff": "--- a/mylib/core.py\\n+++ b/mylib/core.py\\n@@ -42,3 +42,3 @@\\n     def compare(self, x, y):\\n-        return x == y\\n+        return x is y\\n", "why": "Changed equality to identity comparison as required"}
 """,
-        Phase.TEST_STAGE: """
+    Phase.TEST_STAGE: """
 ## PHASE: TEST_STAGE - Verify the Fix
 
 Run the relevant tests to confirm your fix works.
@@ -337,7 +400,7 @@ OUTPUT: {"mode": "tool_request", "requests": [{"tool": "sandbox.run_command", "a
 
 If no specific test is mentioned, run: pytest -x --tb=short
 """,
-        Phase.DIAGNOSE: """
+    Phase.DIAGNOSE: """
 ## PHASE: DIAGNOSE - Analyze Test Failures
 
 Tests failed. Analyze WHY:
@@ -349,7 +412,7 @@ Tests failed. Analyze WHY:
 
 OUTPUT: Read the failing test file or the patched source file
 """,
-        Phase.MINIMIZE: """
+    Phase.MINIMIZE: """
 ## PHASE: MINIMIZE - Clean Up
 
 Ensure your fix is minimal:
@@ -359,15 +422,26 @@ Ensure your fix is minimal:
 
 OUTPUT: Final verification or adjusted patch
 """,
-        Phase.FINALIZE: """
+    Phase.FINALIZE: """
 ## PHASE: FINALIZE - Complete
 
 Tests pass! Finalize the solution.
 
 OUTPUT: {"mode": "feature_summary", "summary": "Fixed [problem] by [change made]", "completion_status": "complete"}
 """,
-    }
-    return instructions.get(phase, "Proceed with the task.")
+}
+
+
+def _get_phase_instruction(phase: Phase) -> str:
+    """Get detailed instruction for current phase."""
+    return _PHASE_INSTRUCTIONS.get(phase, "Proceed with the task.")
+
+
+# Phase header + instruction block, formatted once per phase at import
+_PHASE_PROMPT_SECTIONS: dict[Phase, str] = {
+    phase: f"\n# 📋 CURRENT PHASE: {phase.value}\n{_get_phase_instruction(phase)}"
+    for phase in Phase
+}
 
 
 def _parse_response_to_proposal(response: dict, state: AgentState) -> Proposal:
@@ -375,10 +449,6 @@ def _parse_response_to_proposal(response: dict, state: AgentState) -> Proposal:
     mode = response.get("mode", "tool_request")
     why = response.get("why", "")
     
-    # Track this action in history
-    if "action_history" not in state.notes:
-        state.notes["action_history"] = []
-    
     if mode == "patch":
         diff = response.get("diff", "")
         files = _extract_files_from_diff(diff)
@@ -395,15 +465,20 @@ def _parse_response_to_proposal(response: dict, state: AgentState) -> Proposal:
         if not requests:
             return _infer_proposal_from_phase(state, why)
         
-        # Parse all requests
+        # Fold multiple requests into one round instead of dropping all but the first
+        if len(requests) > 1:
+            batch = _batch_requests_to_proposal(requests, state, why)
+            if batch is not None:
+                return batch
+        
         first_req = requests[0]
         tool = first_req.get("tool", "")
         args = first_req.get("args", {})
         
         # Determine proposal kind and inputs
-        if any(kw in tool for kw in ["grep", "search", "find", "rg"]):
+        if _has_kw(tool, _SEARCH_KWS):
             query = args.get("query", args.get("pattern", ""))
-            state.notes["action_history"].append(f"Search: {query}")
+            _record_search(state, "Search", query)
             return Proposal(
                 kind="search",
                 rationale=why or f"Search for: {query}",
@@ -411,11 +486,10 @@ def _parse_response_to_proposal(response: dict, state: AgentState) -> Proposal:
                 evidence=[],
             )
         
-        elif any(kw in tool for kw in ["read", "cat", "view"]):
+        elif _has_kw(tool, _READ_KWS):
             path = args.get("path", args.get("file", ""))
             # Avoid re-reading the same file
-            files_read = state.notes.get("files_read", [])
-            if path in files_read:
+            if path in state.notes.get("files_read", ()):
                 # Force a search instead
                 return _infer_proposal_from_phase(state, f"Already read {path}, trying search")
             state.notes["action_history"].append(f"Read: {path}")
@@ -426,7 +500,7 @@ def _parse_response_to_proposal(response: dict, state: AgentState) -> Proposal:
                 evidence=[],
             )
         
-        elif any(kw in tool for kw in ["test", "pytest", "run"]):
+        elif _has_kw(tool, _TEST_KWS):
             cmd = args.get("command", args.get("cmd", "pytest"))
             state.notes["action_history"].append(f"Run: {cmd}")
             return Proposal(
@@ -462,18 +536,92 @@ def _parse_response_to_proposal(response: dict, state: AgentState) -> Proposal:
     return _infer_proposal_from_phase(state, why)
 
 
+def _batch_requests_to_proposal(requests: list[dict], state: AgentState, why: str) -> Proposal | None:
+    """Fold a multi-request tool_request into a single batch proposal.
+    
+    Reads are merged into one inspect op so their contents land together in
+    ``last_file_contents``; already-read files are skipped, and so are ops
+    the current phase does not allow, so one disallowed request does not
+    sink the rest. A single surviving op comes back as a plain proposal;
+    None when nothing survives, so the caller handles the first request.
+    """
+    files_read = state.notes.get("files_read", ())
+    read_paths: list[str] = []
+    other_ops: list[dict] = []
+    
+    for req in requests:
+        tool = req.get("tool", "")
+        args = req.get("args", {})
+        path = None
+        if _has_kw(tool, _SEARCH_KWS):
+            query = args.get("query", args.get("pattern", ""))
+            if query:
+                other_ops.append({"kind": "search", "inputs": {"query": query}})
+        elif _has_kw(tool, _READ_KWS):
+            path = args.get("path", args.get("file", ""))
+        elif _has_kw(tool, _TEST_KWS):
+            cmd = args.get("command", args.get("cmd", "pytest"))
+            other_ops.append({"kind": "run_tests", "inputs": {"command": cmd}})
+        elif "path" in args:
+            path = args["path"]
+        if path and path not in files_read and path not in read_paths:
+            read_paths.append(path)
+    
+    ops: list[dict[str, Any]] = [{"kind": "inspect", "inputs": {"files": read_paths}}] if read_paths else []
+    ops.extend(other_ops)
+    allowed_kinds = _allowed_kinds_for_phase(state.phase)
+    ops = [op for op in ops if op["kind"] in allowed_kinds]
+    if not ops:
+        return None
+    
+    for op in ops:
+        if op["kind"] == "search":
+            _record_search(state, "Search", op["inputs"]["query"])
+        elif op["kind"] == "inspect":
+            for path in read_paths:
+                state.notes["action_history"].append(f"Read: {path}")
+        else:
+            state.notes["action_history"].append(f"Run: {op['inputs']['command']}")
+    
+    if len(ops) == 1:
+        return Proposal(kind=ops[0]["kind"], rationale=why or "Tool request", inputs=ops[0]["inputs"], evidence=[])
+    
+    return Proposal(
+        kind="batch",
+        rationale=why or f"Batch of {len(ops)} tool requests",
+        inputs={"ops": ops},
+        evidence=[],
+    )
+
+
+# Phase groups used by the inference fallbacks
+_LOCALIZE_OR_PLAN = frozenset({Phase.LOCALIZE, Phase.PLAN})
+_SEARCH_FALLBACK_PHASES = frozenset({Phase.LOCALIZE, Phase.PLAN, Phase.PATCH_CANDIDATES})
+_FORCE_FINALIZE_PHASES = frozenset({Phase.PATCH_CANDIDATES, Phase.PLAN})
+
+
+def _record_search(state: AgentState, label: str, query: str) -> None:
+    """Log a search in the action history and remember its query."""
+    state.notes["action_history"].append(f"{label}: {query}")
+    state.notes.setdefault("searched_terms", set()).add(query)
+
+
 def _infer_proposal_from_phase(state: AgentState, why: str) -> Proposal:
     """Infer a sensible proposal based on current phase when parsing fails."""
     problem = state.notes.get("problem_statement", "")
-    files_read = state.notes.get("files_read", [])
-    history = state.notes.get("action_history", [])
+    files_read = state.notes.get("files_read", set())
     last_contents = state.notes.get("last_file_contents", {})
     
-    # Use regex-based extraction for clean code identifiers
-    code_terms = _extract_code_identifiers(problem)
+    # Use regex-based extraction for clean code identifiers (once per problem statement)
+    cached = state.notes.get("_code_identifiers")
+    if cached is not None and cached[0] == problem:
+        code_terms = cached[1]
+    else:
+        code_terms = _extract_code_identifiers(problem)
+        state.notes["_code_identifiers"] = (problem, code_terms)
     
     # Check if we've already searched these terms
-    searched_terms = [h.split(": ")[-1] for h in history if "search" in h.lower()]
+    searched_terms = state.notes.get("searched_terms", set())
     unsearched_terms = [t for t in code_terms if t not in searched_terms]
     
     # CRITICAL: In PATCH_CANDIDATES phase with file contents - force edit proposal
@@ -492,9 +640,9 @@ def _infer_proposal_from_phase(state: AgentState, why: str) -> Proposal:
         )
     
     # In LOCALIZE, PLAN phases - try searching if we have clean terms
-    if state.phase in [Phase.LOCALIZE, Phase.PLAN] and unsearched_terms:
+    if state.phase in _LOCALIZE_OR_PLAN and unsearched_terms:
         term = unsearched_terms[0]
-        state.notes["action_history"].append(f"Inferred search: {term}")
+        _record_search(state, "Inferred search", term)
         return Proposal(
             kind="search",
             rationale=why or f"Search for code term: {term}",
@@ -516,12 +664,12 @@ def _infer_proposal_from_phase(state: AgentState, why: str) -> Proposal:
                 )
     
     # Try fallback search terms if no code identifiers found
-    if state.phase in [Phase.LOCALIZE, Phase.PLAN, Phase.PATCH_CANDIDATES]:
+    if state.phase in _SEARCH_FALLBACK_PHASES:
         # Search for common patterns
         fallback_terms = ["def ", "class ", "import "]
         for term in fallback_terms:
             if term not in searched_terms:
-                state.notes["action_history"].append(f"Fallback search: {term}")
+                _record_search(state, "Fallback search", term)
                 return Proposal(
                     kind="search",
                     rationale=f"Searching for {term.strip()} patterns",
@@ -530,8 +678,8 @@ def _infer_proposal_from_phase(state: AgentState, why: str) -> Proposal:
                 )
     
     # Only fall back to problem_statement once
-    ps_reads = sum(1 for h in history if "problem_statement" in h.lower())
-    if ps_reads < 1:
+    if state.notes.get("problem_statement_reads", 0) < 1:
+        state.notes["problem_statement_reads"] = state.notes.get("problem_statement_reads", 0) + 1
         state.notes["action_history"].append("Read problem_statement")
         return Proposal(
             kind="inspect",
@@ -541,7 +689,7 @@ def _infer_proposal_from_phase(state: AgentState, why: str) -> Proposal:
         )
     
     # Force finalize if we've exhausted all options
-    if state.phase in [Phase.PATCH_CANDIDATES, Phase.PLAN]:
+    if state.phase in _FORCE_FINALIZE_PHASES:
         state.notes["action_history"].append("Force finalize - no more actions")
         return Proposal(
             kind="finalize",
@@ -551,7 +699,7 @@ def _infer_proposal_from_phase(state: AgentState, why: str) -> Proposal:
         )
     
     # Generic search as absolute last resort
-    state.notes["action_history"].append("Generic search: error")
+    _record_search(state, "Generic search", "error")
     return Proposal(
         kind="search",
         rationale="Searching for error patterns",
@@ -560,29 +708,87 @@ def _infer_proposal_from_phase(state: AgentState, why: str) -> Proposal:
     )
 
 
+# Path after "--- a/" / "+++ b/", which may contain spaces, minus any
+# trailing tab-separated timestamp
+_DIFF_FILE_RE = re.compile(r'^(?:--- a|\+\+\+ b)/([^\t\n]+?)[ \t\r]*(?:\t[^\n]*)?$', re.MULTILINE)
+
+
 def _extract_files_from_diff(diff: str) -> list[str]:
-    """Extract file paths from a unified diff."""
-    files = []
+    """Extract file paths from a unified diff (deduplicated, in diff order)."""
+    return [p for p in dict.fromkeys(_DIFF_FILE_RE.findall(diff)) if p != "/dev/null"]
+
+
+class _ParsedDiff(NamedTuple):
+    """Line buckets of a unified diff, produced by a single scan."""
+    removals: tuple[str, ...]     # "-" lines, prefix stripped
+    additions: tuple[str, ...]    # "+" lines, prefix stripped
+    context: tuple[str, ...]      # non-empty lines that are not changes or headers
+    target_file: str | None       # path from the last "--- a/" / "+++ b/" header
+    has_header: bool              # saw a "diff --git" line
+    has_hunks: bool               # saw an "@@" line
+
+
+@lru_cache(maxsize=32)
+def _parse_diff(diff: str) -> _ParsedDiff:
+    """Classify every diff line in one pass.
+    
+    Memoized on the diff text because one edit validates, repairs and
+    falls back through several helpers that all need the same breakdown.
+    """
+    removals: list[str] = []
+    additions: list[str] = []
+    context: list[str] = []
+    target_file = None
+    has_header = has_hunks = False
+    
     for line in diff.split("\n"):
-        if line.startswith("+++ b/") or line.startswith("--- a/"):
-            path = line[6:].strip()
-            if path and path != "/dev/null":
-                files.append(path)
-    return list(set(files))
+        c = line[:1]
+        if c == "-":
+            if line.startswith("---"):
+                if line.startswith("--- a/"):
+                    target_file = line[6:].split("\t")[0]
+            else:
+                removals.append(line[1:])
+        elif c == "+":
+            if line.startswith("+++"):
+                if line.startswith("+++ b/"):
+                    target_file = line[6:].split("\t")[0]
+            else:
+                additions.append(line[1:])
+        elif c == "@":
+            has_hunks = has_hunks or line.startswith("@@")
+        elif line.startswith("diff"):
+            has_header = has_header or line.startswith("diff --git")
+        elif line:
+            context.append(line)
+    
+    return _ParsedDiff(
+        tuple(removals), tuple(additions), tuple(context),
+        target_file, has_header, has_hunks,
+    )
 
 
 # =============================================================================
 # GATE FUNCTION - Validates proposals against constraints
 # =============================================================================
 
+# Directories the agent may never edit, at the repo root or nested
+_FORBIDDEN_DIR_RE = re.compile(r'(?:^|/)((?:vendor|node_modules|\.venv|dist|build|target)/)')
+# Case-insensitive "test" anywhere in the path, without lowercasing every path
+_TEST_PATH_RE = re.compile("test", re.IGNORECASE)
+
+
 def gate(profile: Profile, state: AgentState, proposal: Proposal) -> GateDecision:
     """Validate a proposal against profile constraints."""
+    if proposal.kind == "batch":
+        return _gate_batch(profile, state, proposal)
+    
     # 1. Check phase constraints
     allowed_kinds = _allowed_kinds_for_phase(state.phase)
     if proposal.kind not in allowed_kinds:
         return GateDecision(
             accept=False,
-            reason=f"Action '{proposal.kind}' not allowed in phase {state.phase.value}. Allowed: {allowed_kinds}",
+            reason=f"Action '{proposal.kind}' not allowed in phase {state.phase.value}. Allowed: {list(allowed_kinds)}",
         )
     
     # 2. Check budget constraints
@@ -610,18 +816,17 @@ def gate(profile: Profile, state: AgentState, proposal: Proposal) -> GateDecisio
                 reason=f"Too many files ({len(files)} > {profile.max_files_touched})",
             )
         
-        forbidden_dirs = ["vendor/", "node_modules/", ".venv/", "dist/", "build/", "target/"]
         for f in files:
-            for forbidden in forbidden_dirs:
-                if f.startswith(forbidden) or f"/{forbidden}" in f:
-                    return GateDecision(
-                        accept=False,
-                        reason=f"Cannot edit forbidden directory: {forbidden}",
-                    )
+            match = _FORBIDDEN_DIR_RE.search(f)
+            if match:
+                return GateDecision(
+                    accept=False,
+                    reason=f"Cannot edit forbidden directory: {match.group(1)}",
+                )
         
         diff = proposal.inputs.get("diff", "")
-        diff_lines = len([line for line in diff.split("\n") 
-                         if line.startswith("+") or line.startswith("-")])
+        # Count lines starting with +/- (headers included) without splitting
+        diff_lines = diff.count("\n+") + diff.count("\n-") + diff.startswith(("+", "-"))
         if diff_lines > profile.max_diff_lines:
             return GateDecision(
                 accept=False,
@@ -638,7 +843,7 @@ def gate(profile: Profile, state: AgentState, proposal: Proposal) -> GateDecisio
             files = _extract_files_from_diff(diff)
         
         for f in files:
-            if "test" in f.lower() or f.startswith("tests/") or "test_" in f:
+            if _TEST_PATH_RE.search(f):
                 state.notes["last_gate_reject"] = f"Cannot edit test files: {f}"
                 return GateDecision(
                     accept=False,
@@ -648,25 +853,61 @@ def gate(profile: Profile, state: AgentState, proposal: Proposal) -> GateDecisio
     return GateDecision(accept=True, reason="All constraints satisfied")
 
 
-def _allowed_kinds_for_phase(phase: Phase) -> list[str]:
+def _gate_batch(profile: Profile, state: AgentState, proposal: Proposal) -> GateDecision:
+    """Validate a batch proposal: every op must pass the gate on its own."""
+    ops = proposal.inputs.get("ops", [])
+    if not ops:
+        return GateDecision(accept=False, reason="Empty batch proposal")
+    
+    test_ops = sum(1 for op in ops if op.get("kind") == "run_tests")
+    if test_ops and state.budget.test_runs + test_ops > profile.max_test_runs:
+        return GateDecision(
+            accept=False,
+            reason=f"Test budget exhausted by batch ({state.budget.test_runs}+{test_ops}/{profile.max_test_runs})",
+        )
+    
+    for op in ops:
+        if op.get("kind") == "batch":
+            return GateDecision(accept=False, reason="Nested batch proposals are not allowed")
+        decision = gate(profile, state, _batch_op_proposal(proposal, op))
+        if not decision.accept:
+            return GateDecision(accept=False, reason=f"Batched {op.get('kind')}: {decision.reason}")
+    
+    return GateDecision(accept=True, reason=f"All {len(ops)} batched actions satisfy constraints")
+
+
+def _batch_op_proposal(batch: Proposal, op: dict) -> Proposal:
+    """Build the single-action proposal for one op of a batch."""
+    return Proposal(kind=op["kind"], rationale=batch.rationale, inputs=op.get("inputs", {}))
+
+
+_ALLOWED_KINDS: dict[Phase, tuple[str, ...]] = {
+    Phase.INGEST: ("inspect", "search"),
+    Phase.LOCALIZE: ("inspect", "search"),
+    Phase.PLAN: ("inspect", "search", "edit"),  # Allow edit from PLAN
+    Phase.PATCH_CANDIDATES: ("edit", "inspect", "search"),
+    Phase.TEST_STAGE: ("run_tests", "inspect"),
+    Phase.DIAGNOSE: ("inspect", "search", "edit"),
+    Phase.MINIMIZE: ("edit", "inspect", "run_tests"),
+    Phase.FINALIZE: ("finalize", "run_tests"),
+    Phase.DONE: (),
+}
+
+
+def _allowed_kinds_for_phase(phase: Phase) -> tuple[str, ...]:
     """Get allowed proposal kinds for a given phase."""
-    return {
-        Phase.INGEST: ["inspect", "search"],
-        Phase.LOCALIZE: ["inspect", "search"],
-        Phase.PLAN: ["inspect", "search", "edit"],  # Allow edit from PLAN
-        Phase.PATCH_CANDIDATES: ["edit", "inspect", "search"],
-        Phase.TEST_STAGE: ["run_tests", "inspect"],
-        Phase.DIAGNOSE: ["inspect", "search", "edit"],
-        Phase.MINIMIZE: ["edit", "inspect", "run_tests"],
-        Phase.FINALIZE: ["finalize", "run_tests"],
-        Phase.DONE: [],
-    }.get(phase, ["inspect"])
+    return _ALLOWED_KINDS.get(phase, ("inspect",))
 
 
 # =============================================================================
 # EXEC FUNCTION - Executes proposals
 # =============================================================================
 
+# Search tools, resolved once at import (None when not installed)
+_RG_PATH = shutil.which("rg")
+_GREP_PATH = shutil.which("grep")
+
+
 def execute(profile: Profile, state: AgentState, proposal: Proposal) -> ExecResult:
     """Execute a proposal."""
     logger.info("Executing proposal", kind=proposal.kind)
@@ -681,10 +922,57 @@ def execute(profile: Profile, state: AgentState, proposal: Proposal) -> ExecResu
         return _exec_run_tests(state, proposal)
     elif proposal.kind == "finalize":
         return _exec_finalize(state, proposal)
+    elif proposal.kind == "batch":
+        return _exec_batch(profile, state, proposal)
     else:
         return ExecResult(status="fail", summary=f"Unknown proposal kind: {proposal.kind}")
 
 
+def _exec_batch(profile: Profile, state: AgentState, proposal: Proposal) -> ExecResult:
+    """Execute each op of a batch proposal in order within one round."""
+    results = [
+        execute(profile, state, _batch_op_proposal(proposal, op))
+        for op in proposal.inputs.get("ops", [])
+    ]
+    
+    metrics: dict = {}
+    artifacts: list[str] = []
+    for result in results:
+        metrics.update(result.metrics)
+        artifacts.extend(result.artifacts)
+    metrics["batch"] = [{"status": r.status, "summary": r.summary} for r in results]
+    
+    return ExecResult(
+        status="ok" if all(r.status == "ok" for r in results) else "fail",
+        summary="; ".join(r.summary for r in results),
+        artifacts=artifacts,
+        metrics=metrics,
+    )
+
+
+@lru_cache(maxsize=256)
+def _read_truncated(path: str, mtime_ns: int, size: int) -> str:
+    """Read the first 8000 bytes of a file, memoized on (path, mtime, size).
+    
+    The stat fields are part of the key so edits to the file miss the cache.
+    Only the head of the file is read, so large files cost no more than small ones.
+    """
+    with open(path, "rb") as f:
+        return f.read(8000).decode("utf-8", errors="replace")
+
+
+def _read_inspect_file(path: Path) -> tuple[str, bool]:
+    """Read one file for inspection, returning (content or error text, was_read)."""
+    try:
+        st = path.stat()
+    except OSError:
+        return "File not found", False
+    try:
+        return _read_truncated(str(path), st.st_mtime_ns, st.st_size), True
+    except Exception as e:
+        return f"Error reading: {e}", False
+
+
 def _exec_inspect(state: AgentState, proposal: Proposal) -> ExecResult:
     """Execute an inspect proposal."""
     workdir = Path(state.repo.workdir)
@@ -703,22 +991,21 @@ def _exec_inspect(state: AgentState, proposal: Proposal) -> ExecResult:
     
     if files:
         contents = {}
-        files_read = state.notes.get("files_read", [])
+        files_read = state.notes.setdefault("files_read", set())
         
-        for f in files:
-            path = workdir / f
-            if path.exists():
-                try:
-                    file_content = path.read_text()[:8000]
-                    contents[f] = file_content
-                    if f not in files_read:
-                        files_read.append(f)
-                except Exception as e:
-                    contents[f] = f"Error reading: {e}"
-            else:
-                contents[f] = "File not found"
+        paths = [workdir / f for f in files]
+        if len(paths) > 1:
+            # I/O-bound: overlap reads across files
+            with ThreadPoolExecutor(max_workers=min(8, len(paths))) as pool:
+                results = list(pool.map(_read_inspect_file, paths))
+        else:
+            results = [_read_inspect_file(p) for p in paths]
+        
+        for f, (content, was_read) in zip(files, results):
+            contents[f] = content
+            if was_read:
+                files_read.add(f)
         
-        state.notes["files_read"] = files_read
         state.notes["last_file_contents"] = contents
         
         # Add to localization hits if file contains useful info
@@ -740,6 +1027,182 @@ def _exec_inspect(state: AgentState, proposal: Proposal) -> ExecResult:
     return ExecResult(status="ok", summary="No files to inspect")
 
 
+def _collect_null_paths(cmd: list[str], workdir: Path, limit: int = 20, timeout: float = 30) -> list[str]:
+    """Run a list-files command and return the first ``limit`` NUL-delimited paths.
+    
+    Output is read as it arrives and the process is killed once ``limit``
+    paths are in hand (the ``| head -n N`` effect without a shell), so a
+    broad query stops walking the tree early. A run that exits non-zero
+    before reaching the limit yields no paths.
+    
+    Raises:
+        subprocess.TimeoutExpired: if the command outlives ``timeout``
+    """
+    proc = subprocess.Popen(cmd, cwd=workdir, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    stdout = proc.stdout
+    assert isinstance(stdout, io.BufferedReader)  # binary stdout=PIPE
+    timed_out = threading.Event()
+    
+    def _kill() -> None:
+        timed_out.set()
+        proc.kill()
+    
+    timer = threading.Timer(timeout, _kill)
+    timer.start()
+    paths: list[bytes] = []
+    pending = b""
+    try:
+        while len(paths) < limit:
+            chunk = stdout.read1(65536)
+            if not chunk:
+                break
+            *done, pending = (pending + chunk).split(b"\0")
+            paths.extend(p for p in done if p)
+        if len(paths) >= limit:
+            proc.kill()
+    except BaseException:
+        proc.kill()
+        raise
+    finally:
+        timer.cancel()
+        stdout.close()
+        returncode = proc.wait()
+    
+    if timed_out.is_set():
+        raise subprocess.TimeoutExpired(cmd, timeout)
+    if len(paths) < limit and returncode != 0:
+        return []
+    return [os.fsdecode(p) for p in paths[:limit]]
+
+
+_PREFILTER_MAX_PATHS = 1000
+_REGEX_BREAKS = frozenset(".^$+")
+
+
+def _required_literal(pattern: str, min_len: int = 3) -> str | None:
+    """Return the longest literal run every match of ``pattern`` must contain.
+    
+    Conservative: patterns with alternation or groups yield None, as do
+    patterns whose longest guaranteed run is shorter than ``min_len``.
+    """
+    best = ""
+    run: list[str] = []
+    i = 0
+    while i <= len(pattern):
+        ch = pattern[i] if i < len(pattern) else None
+        i += 1
+        if ch in ("|", "("):
+            return None
+        if ch == "\\" and i < len(pattern):
+            nxt = pattern[i]
+            i += 1
+            if not nxt.isalnum():
+                run.append(nxt)  # Escaped punctuation is a literal
+                continue
+        elif ch == "[":
+            close = pattern.find("]", i + 1)
+            i = len(pattern) if close < 0 else close + 1
+        elif ch in ("?", "*", "{"):
+            if run:
+                run.pop()  # Preceding char is optional
+            if ch == "{":
+                close = pattern.find("}", i)
+                i = len(pattern) if close < 0 else close + 1
+        elif ch is not None and ch not in _REGEX_BREAKS:
+            run.append(ch)
+            continue
+        # Run ends here (metachar, class, or end of pattern)
+        if len(run) > len(best):
+            best = "".join(run)
+        run = []
+    return best if len(best) >= min_len else None
+
+
+_NETWORK_FS_TYPES = frozenset({"nfs", "nfs4", "cifs", "smb3", "smbfs", "9p", "fuse.sshfs", "afs"})
+_MOUNTS_PATH = "/proc/self/mounts"
+# Octal escapes the kernel writes in mount fields, e.g. "\040" for a space
+_MOUNT_ESCAPE_RE = re.compile(r"\\([0-7]{3})")
+
+
+def _unescape_mount_field(field: str) -> str:
+    """Decode the octal escapes in a /proc/mounts field."""
+    return _MOUNT_ESCAPE_RE.sub(lambda m: chr(int(m.group(1), 8)), field)
+
+
+@lru_cache(maxsize=64)
+def _is_network_fs(path: str) -> bool:
+    """Check whether ``path`` lives on a network filesystem (Linux /proc/mounts)."""
+    try:
+        with open(_MOUNTS_PATH) as f:
+            mounts = [
+                (_unescape_mount_field(fields[1]), fields[2])
+                for fields in map(str.split, f) if len(fields) >= 3
+            ]
+    except OSError:
+        return False
+    fstype = ""
+    best = -1
+    for mount_point, mount_type in mounts:
+        if (path == mount_point or path.startswith(mount_point.rstrip("/") + "/")) and len(mount_point) > best:
+            best, fstype = len(mount_point), mount_type
+    return fstype in _NETWORK_FS_TYPES
+
+
+def _run_rg(workdir: Path, args: list[str], limit: int = 20) -> list[str]:
+    """Run rg in list-files mode and return the first ``limit`` matching paths."""
+    assert _RG_PATH is not None  # callers check _RG_PATH first
+    tuning = [] if _is_network_fs(str(workdir.resolve())) else ["--mmap"]
+    return _collect_null_paths([_RG_PATH, "-l", "--null", *tuning, *args], workdir, limit)
+
+
+# Below this size a plain read() is cheaper than setting up a mapping
+_MMAP_MIN_SIZE = 64 * 1024
+
+
+def _file_contains(path: str, needle: bytes) -> bool:
+    """Check whether a file contains ``needle`` without decoding it."""
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return False  # mmap rejects empty files
+        if size < _MMAP_MIN_SIZE:
+            return needle in f.read()
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            return buf.find(needle) >= 0
+
+
+# Non-code directories the Python search fallback never descends into
+# (hidden directories such as .git/.venv/.tox are skipped separately)
+_SEARCH_SKIP_DIRS = frozenset({
+    "__pycache__", "node_modules", "venv", "build", "dist", "target",
+})
+
+
+def _iter_python_files(root: str) -> Iterator[tuple[str, str]]:
+    """Yield (path, relative path) for .py files under root, depth-first.
+    
+    Uses os.scandir directly so directory entries are classified from their
+    cached type info; hidden and common non-code directories are skipped.
+    """
+    prefix_len = len(root) if root.endswith(os.sep) else len(root) + 1
+    stack = [root]
+    while stack:
+        current = stack.pop()
+        subdirs = []
+        try:
+            with os.scandir(current) as entries:
+                for entry in entries:
+                    name = entry.name
+                    if entry.is_dir(follow_symlinks=False):
+                        if name[:1] != '.' and name not in _SEARCH_SKIP_DIRS:
+                            subdirs.append(entry.path)
+                    elif name.endswith('.py'):
+                        yield entry.path, entry.path[prefix_len:]
+        except OSError:
+            continue  # Unreadable directory
+        stack.extend(reversed(subdirs))
+
+
 def _exec_search(state: AgentState, proposal: Proposal) -> ExecResult:
     """Execute a search proposal using ripgrep, grep, or Python fallback."""
     workdir = Path(state.repo.workdir)
@@ -748,63 +1211,55 @@ def _exec_search(state: AgentState, proposal: Proposal) -> ExecResult:
     if not query:
         return ExecResult(status="fail", summary="No search query provided")
     
+    # Queries are literal unless the proposal opts into regex matching
+    use_regex = bool(proposal.inputs.get("regex", False))
+    is_python = state.repo.language == "python"
     files = []
     
     # Try ripgrep first
-    try:
-        result = subprocess.run(
-            ["rg", "-l", "--max-count", "5", query],
-            cwd=workdir,
-            capture_output=True,
-            text=True,
-            timeout=30,
-            check=False,
-        )
-        if result.returncode == 0 and result.stdout.strip():
-            files = [f.strip() for f in result.stdout.strip().split("\n") if f.strip()][:20]
-    except FileNotFoundError:
-        pass  # rg not available
-    
-    # Try grep if rg didn't work
-    if not files:
-        try:
-            result = subprocess.run(
-                ["grep", "-rl", "--include=*.py", query, "."],
-                cwd=workdir,
-                capture_output=True,
-                text=True,
-                timeout=30,
-                check=False,
-            )
-            if result.returncode == 0 and result.stdout.strip():
-                files = [f.strip() for f in result.stdout.strip().split("\n") if f.strip()][:20]
-        except FileNotFoundError:
-            pass  # grep not available
+    if _RG_PATH:
+        # -l needs only the first match per file
+        rg_args = ["--max-count", "1"]
+        if is_python:
+            rg_args.append("--type=py")
+        if not use_regex:
+            files = _run_rg(workdir, [*rg_args, "--fixed-strings", "-e", query])
+        else:
+            # Two-phase: a literal pre-filter narrows candidates for the regex pass
+            literal = _required_literal(query)
+            candidates = None
+            if literal:
+                candidates = _run_rg(
+                    workdir,
+                    [*rg_args, "--fixed-strings", "-e", literal],
+                    limit=_PREFILTER_MAX_PATHS + 1,
+                )
+                if len(candidates) > _PREFILTER_MAX_PATHS:
+                    candidates = None  # Too broad to pass as argv; let rg walk
+            if candidates is None:
+                files = _run_rg(workdir, [*rg_args, "-e", query])
+            elif candidates:
+                files = _run_rg(workdir, [*rg_args, "-e", query, "--", *candidates])
+    
+    # Try grep only when rg is not installed
+    elif _GREP_PATH:
+        grep_cmd = [_GREP_PATH, "-rl", "--null", "--include=*.py"]
+        if not use_regex:
+            grep_cmd.append("--fixed-strings")
+        files = _collect_null_paths([*grep_cmd, "-e", query, "."], workdir)
     
     # Python fallback - walk directory and search
     if not files:
+        query_bytes = query.encode("utf-8")
         try:
-            for root, dirs, filenames in workdir.walk():
-                # Skip hidden and common non-code directories
-                dirs[:] = [d for d in dirs if not d.startswith('.') and d not in [
-                    '__pycache__', 'node_modules', 'venv', '.git', 'build', 'dist'
-                ]]
-                
-                for fname in filenames:
-                    if not fname.endswith('.py'):
-                        continue
-                    fpath = root / fname
-                    try:
-                        content = fpath.read_text(errors='ignore')
-                        if query in content:
-                            rel_path = str(fpath.relative_to(workdir))
-                            files.append(rel_path)
-                            if len(files) >= 20:
-                                break
-                    except Exception:
-                        pass
-                if len(files) >= 20:
-                    break
+            for fpath, rel_path in _iter_python_files(str(workdir)):
+                try:
+                    if _file_contains(fpath, query_bytes):
+                        files.append(rel_path)
+                        if len(files) >= 20:
+                            break
+                except Exception:
+                    pass
         except Exception as e:
             return ExecResult(status="fail", summary=f"Python search failed: {e}")
     
@@ -864,51 +1319,10 @@ def _exec_edit(state: AgentState, proposal: Proposal) -> ExecResult:
     diff = _repair_patch(diff)
     
     try:
-        with tempfile.NamedTemporaryFile(mode="w", suffix=".patch", delete=False) as f:
-            f.write(diff)
-            patch_path = f.name
-        
-        # Check first
-        result = subprocess.run(
-            ["git", "apply", "--check", patch_path],
-            cwd=workdir,
-            capture_output=True,
-            text=True,
-            check=False,
-        )
-        
-        if result.returncode != 0:
-            # Log the failed patch for debugging
-            logger.warning(
-                "Patch check failed",
-                error=result.stderr[:500],
-                diff_preview=diff[:500],
-            )
-            
-            # Try to apply as a direct file edit if patch fails
-            edit_result = _try_direct_edit(state, proposal, diff)
-            if edit_result:
-                return edit_result
-            
-            # Try structured SEARCH/REPLACE approach
-            structured_result = _try_structured_edit(state, proposal, diff)
-            if structured_result:
-                return structured_result
-            
-            return ExecResult(
-                status="fail",
-                summary=f"Patch check failed: {result.stderr[:200]}",
-                metrics={"stderr": result.stderr, "diff": diff[:1000]},
-            )
-        
-        # Apply with --3way for more lenient patching
-        result = subprocess.run(
-            ["git", "apply", "--3way", patch_path],
-            cwd=workdir,
-            capture_output=True,
-            text=True,
-            check=False,
-        )
+        # Plain git apply is atomic: it validates every hunk before writing and
+        # leaves the tree untouched on failure, so no separate --check pass is
+        # needed. (--3way is not: it writes conflict markers on failure.)
+        result = _git_apply(workdir, diff)
         
         if result.returncode == 0:
             files = proposal.inputs.get("files", [])
@@ -918,12 +1332,45 @@ def _exec_edit(state: AgentState, proposal: Proposal) -> ExecResult:
                 summary=f"Patch applied successfully ({len(files)} files)",
                 artifacts=files,
             )
-        else:
-            return ExecResult(status="fail", summary=f"Patch apply failed: {result.stderr[:200]}")
+        
+        # Log the failed patch for debugging
+        logger.warning(
+            "Patch apply failed",
+            error=result.stderr[:500],
+            diff_preview=diff[:500],
+        )
+        
+        # Try to apply as a direct file edit if patch fails
+        edit_result = _try_direct_edit(state, proposal, diff)
+        if edit_result:
+            return edit_result
+        
+        # Try structured SEARCH/REPLACE approach
+        structured_result = _try_structured_edit(state, proposal, diff)
+        if structured_result:
+            return structured_result
+        
+        return ExecResult(
+            status="fail",
+            summary=f"Patch apply failed: {result.stderr[:200]}",
+            metrics={"stderr": result.stderr, "diff": diff[:1000]},
+        )
     except Exception as e:
         return ExecResult(status="fail", summary=f"Edit failed: {e}")
 
 
+def _git_apply(workdir: Path, diff: str, *flags: str) -> subprocess.CompletedProcess:
+    """Run ``git apply [flags]`` with the diff fed on stdin."""
+    return subprocess.run(
+        ["git", "apply", *flags, "-"],
+        cwd=workdir,
+        input=diff,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+
+
 def _validate_patch(diff: str) -> tuple[bool, str]:
     """Validate that a patch contains actual changes.
     
@@ -933,45 +1380,46 @@ def _validate_patch(diff: str) -> tuple[bool, str]:
     if not diff or not diff.strip():
         return False, "Empty diff"
     
-    lines = diff.split("\n")
-    removals = []
-    additions = []
+    # Pair the i-th removed line with the i-th added line as they stream
+    # past, and accept as soon as one pair differs beyond whitespace
+    pending_removed: deque[str] = deque()
+    pending_added: deque[str] = deque()
+    n_removed = n_added = 0
+    identical = True  # every pair so far matches exactly
     
-    for line in lines:
-        # Skip headers and context
-        if line.startswith("---") or line.startswith("+++") or line.startswith("@@"):
-            continue
-        if line.startswith("diff --git"):
+    for line in diff.split("\n"):
+        c = line[:1]
+        if c == "-" and not line.startswith("---"):
+            n_removed += 1
+            if not pending_added:
+                pending_removed.append(line[1:])
+                continue
+            rem, add = line[1:], pending_added.popleft()
+        elif c == "+" and not line.startswith("+++"):
+            n_added += 1
+            if not pending_removed:
+                pending_added.append(line[1:])
+                continue
+            rem, add = pending_removed.popleft(), line[1:]
+        else:
             continue
         
-        # Collect actual changes
-        if line.startswith("-") and not line.startswith("---"):
-            removals.append(line[1:])  # Strip the - prefix
-        elif line.startswith("+") and not line.startswith("+++"):
-            additions.append(line[1:])  # Strip the + prefix
+        if rem.strip() != add.strip():
+            return True, ""
+        identical = identical and rem == add
     
-    if not removals and not additions:
+    if not n_removed and not n_added:
         return False, "No changes in diff (no + or - lines)"
     
+    # If counts differ, there's definitely a change
+    if n_removed != n_added:
+        return True, ""
+    
     # Check for no-op: all removals match all additions
-    if removals == additions:
+    if identical:
         return False, "No-op patch: removed lines identical to added lines"
     
-    # Check for minimal change (at least one actual difference)
-    has_real_change = False
-    for i, (rem, add) in enumerate(zip(removals, additions)):
-        if rem.strip() != add.strip():
-            has_real_change = True
-            break
-    
-    # If lengths differ, there's definitely a change
-    if len(removals) != len(additions):
-        has_real_change = True
-    
-    if not has_real_change and removals and additions:
-        return False, "No meaningful changes (only whitespace differences)"
-    
-    return True, ""
+    return False, "No meaningful changes (only whitespace differences)"
 
 
 def _validate_patch_syntax(diff: str, workdir: Path) -> tuple[bool, str]:
@@ -1074,6 +1522,30 @@ def _simulate_patch(original: str, diff: str, file_path: str) -> str | None:
     return "".join(result_lines)
 
 
+def _splice_same_length(path: Path, old_block: str, new_block: str) -> bool:
+    """Overwrite the first ``old_block`` in a file in place via mmap.
+    
+    Only applies when the encoded replacement has the same length, so the
+    file is never read or rewritten as a whole. Returns False when the
+    block is absent or the sizes differ, leaving the file untouched.
+    """
+    old_bytes = old_block.encode("utf-8")
+    new_bytes = new_block.encode("utf-8")
+    if not old_bytes or len(old_bytes) != len(new_bytes) or old_bytes == new_bytes:
+        return False
+    
+    with open(path, "r+b") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return False  # mmap rejects empty files
+        with mmap.mmap(f.fileno(), 0) as buf:
+            off = buf.find(old_bytes)
+            if off < 0:
+                return False
+            buf[off:off + len(new_bytes)] = new_bytes
+            buf.flush()
+    return True
+
+
 def _try_structured_edit(state: AgentState, proposal: Proposal, diff: str) -> ExecResult | None:
     """Try to apply changes using SEARCH/REPLACE blocks extracted from diff.
     
@@ -1090,22 +1562,12 @@ def _try_structured_edit(state: AgentState, proposal: Proposal, diff: str) -> Ex
         return None
     
     # Parse diff to extract old/new code blocks
-    lines = diff.split("\n")
-    current_file = None
-    removals = []
-    additions = []
+    parsed = _parse_diff(diff)
+    current_file = parsed.target_file
+    removals = parsed.removals
+    additions = parsed.additions
     changes_made = False
     
-    for line in lines:
-        if line.startswith("--- a/"):
-            current_file = line[6:].split("\t")[0]
-        elif line.startswith("+++ b/"):
-            current_file = line[6:].split("\t")[0]
-        elif line.startswith("-") and not line.startswith("---"):
-            removals.append(line[1:])
-        elif line.startswith("+") and not line.startswith("+++"):
-            additions.append(line[1:])
-    
     if not current_file or not (removals or additions):
         return None
     
@@ -1114,6 +1576,16 @@ def _try_structured_edit(state: AgentState, proposal: Proposal, diff: str) -> Ex
         return None
     
     try:
+        if removals and _splice_same_length(
+            file_path, "\n".join(removals), "\n".join(additions)
+        ):
+            state.budget.patch_attempts += 1
+            return ExecResult(
+                status="ok",
+                summary=f"Applied structured edit to {current_file}",
+                artifacts=[current_file],
+            )
+        
         original = file_path.read_text()
         modified = original
         
@@ -1126,21 +1598,33 @@ def _try_structured_edit(state: AgentState, proposal: Proposal, diff: str) -> Ex
                 modified = original.replace(old_block, new_block, 1)
                 changes_made = True
             else:
-                # Try line-by-line fuzzy matching
-                for old_line in removals:
-                    old_stripped = old_line.strip()
-                    if old_stripped and old_stripped in original:
-                        # Find the index of matching additions
-                        idx = removals.index(old_line)
-                        new_line = additions[idx] if idx < len(additions) else ""
-                        # Replace preserving indentation
-                        for orig_line in original.split("\n"):
-                            if orig_line.strip() == old_stripped:
-                                indent = len(orig_line) - len(orig_line.lstrip())
-                                new_with_indent = " " * indent + new_line.strip()
-                                modified = modified.replace(orig_line, new_with_indent, 1)
-                                changes_made = True
-                                break
+                # Try line-by-line fuzzy matching against a stripped-line index.
+                # Each key lists its positions last-first, so popping takes the
+                # earliest unused one: repeated removals consume successive
+                # occurrences and each file line is rewritten at most once
+                orig_lines = original.splitlines(keepends=True)
+                line_index: dict[str, list[int]] = {}
+                for i in range(len(orig_lines) - 1, -1, -1):
+                    stripped = orig_lines[i].strip()
+                    if stripped:
+                        line_index.setdefault(stripped, []).append(i)
+                
+                for idx, old_line in enumerate(removals):
+                    positions = line_index.get(old_line.strip())
+                    if not positions:
+                        continue
+                    i = positions.pop()
+                    # Pair with the addition at the same position
+                    new_line = additions[idx] if idx < len(additions) else ""
+                    # Replace preserving indentation and line ending
+                    orig_line = orig_lines[i]
+                    body = orig_line.rstrip("\r\n")
+                    indent = len(body) - len(body.lstrip())
+                    orig_lines[i] = " " * indent + new_line.strip() + orig_line[len(body):]
+                    changes_made = True
+                
+                if changes_made:
+                    modified = "".join(orig_lines)
         
         if changes_made and modified != original:
             file_path.write_text(modified)
@@ -1157,35 +1641,27 @@ def _try_structured_edit(state: AgentState, proposal: Proposal, diff: str) -> Ex
 
 def _repair_patch(diff: str) -> str:
     """Try to repair common patch format issues."""
-    lines = diff.split("\n")
-    repaired = []
-    
-    in_header = True
-    for i, line in enumerate(lines):
-        # Fix missing diff header
-        if in_header and line.startswith("---") and i == 0:
-            # Check if there's a missing diff --git line
-            if i + 1 < len(lines) and lines[i + 1].startswith("+++"):
-                # Extract paths, stripping existing a/ or b/ prefixes
-                src = line[4:].strip().split("\t")[0]
-                dst = lines[i + 1][4:].strip().split("\t")[0]
-                
-                # Strip existing a/ or b/ prefixes to avoid doubling
-                if src.startswith("a/"):
-                    src = src[2:]
-                if dst.startswith("b/"):
-                    dst = dst[2:]
-                
-                if not any(ln.startswith("diff --git") for ln in lines[:i]):
-                    repaired.append(f"diff --git a/{src} b/{dst}")
-        
-        if line.startswith("@@"):
-            in_header = False
-        
-        repaired.append(line)
+    result = diff
+    
+    # Fix missing diff header: only the first two lines matter, so
+    # look at them directly instead of splitting the whole diff
+    if diff.startswith("---"):
+        first, _, rest = diff.partition("\n")
+        second = rest.partition("\n")[0]
+        if second.startswith("+++"):
+            # Extract paths, stripping existing a/ or b/ prefixes
+            src = first[4:].strip().split("\t")[0]
+            dst = second[4:].strip().split("\t")[0]
+            
+            # Strip existing a/ or b/ prefixes to avoid doubling
+            if src.startswith("a/"):
+                src = src[2:]
+            if dst.startswith("b/"):
+                dst = dst[2:]
+            
+            result = f"diff --git a/{src} b/{dst}\n" + diff
     
     # Ensure proper line endings
-    result = "\n".join(repaired)
     if not result.endswith("\n"):
         result += "\n"
     
@@ -1203,14 +1679,9 @@ def _try_direct_edit(state: AgentState, proposal: Proposal, diff: str) -> ExecRe
     
     # Try to extract the actual changes from the diff
     # Look for +/- lines that aren't headers
-    additions = []
-    deletions = []
-    
-    for line in diff.split("\n"):
-        if line.startswith("+") and not line.startswith("+++"):
-            additions.append(line[1:])
-        elif line.startswith("-") and not line.startswith("---"):
-            deletions.append(line[1:])
+    parsed = _parse_diff(diff)
+    additions = parsed.additions
+    deletions = parsed.removals
     
     if not additions and not deletions:
         return None
@@ -1219,6 +1690,14 @@ def _try_direct_edit(state: AgentState, proposal: Proposal, diff: str) -> ExecRe
     old_block = "\n".join(deletions)
     new_block = "\n".join(additions)
     
+    # Compiled once, reused for every candidate file
+    context_patterns = [
+        re.compile(re.escape(ctx.strip())) for ctx in parsed.context[:3] if ctx.strip()
+    ]
+    
+    def insert_after(match: re.Match) -> str:
+        return match.group(0) + "\n" + new_block
+    
     # Try to find and modify the file
     for fname in files:
         fpath = workdir / fname
@@ -1226,6 +1705,15 @@ def _try_direct_edit(state: AgentState, proposal: Proposal, diff: str) -> ExecRe
             continue
         
         try:
+            # Strategy 1 fast path: same-size replacement spliced in place
+            if _splice_same_length(fpath, old_block, new_block):
+                state.budget.patch_attempts += 1
+                return ExecResult(
+                    status="ok",
+                    summary=f"Applied direct edit to {fname}",
+                    artifacts=[fname],
+                )
+            
             content = fpath.read_text()
             modified = content
             
@@ -1243,13 +1731,10 @@ def _try_direct_edit(state: AgentState, proposal: Proposal, diff: str) -> ExecRe
             # Strategy 3: Just insert additions after a context line
             elif additions and not deletions:
                 # Look for context in the diff (lines without +/-)
-                context_lines = [l for l in diff.split("\n") 
-                                if l and not l.startswith(("+", "-", "@", "diff", "---", "+++"))]
-                for ctx in context_lines[:3]:
-                    if ctx.strip() and ctx.strip() in content:
-                        # Insert after context
-                        idx = content.find(ctx.strip()) + len(ctx.strip())
-                        modified = content[:idx] + "\n" + new_block + content[idx:]
+                for pattern in context_patterns:
+                    # Insert after the first occurrence of the context
+                    modified, n = pattern.subn(insert_after, content, count=1)
+                    if n:
                         break
             
             if modified != content:
@@ -1266,76 +1751,229 @@ def _try_direct_edit(state: AgentState, proposal: Proposal, diff: str) -> ExecRe
     return None
 
 
+_TEST_TIMEOUT = 300  # seconds
+_MAX_FAILURES = 5
+
+_PROBE_TIMEOUT = 30  # seconds
+
+
+def _pytest_interpreter(cmd_parts: list[str], workdir: Path) -> str | None:
+    """Interpreter a pytest command line runs under, or None if unknown."""
+    if cmd_parts[1:3] == ["-m", "pytest"]:
+        return cmd_parts[0]
+    # A pytest console script names its interpreter in the shebang
+    script = str(workdir / cmd_parts[0]) if os.sep in cmd_parts[0] else shutil.which(cmd_parts[0])
+    if not script:
+        return None
+    try:
+        with open(script, "rb") as f:
+            first = f.readline().decode(errors="replace")
+    except OSError:
+        return None
+    shebang = first[2:].split() if first.startswith("#!") else []
+    if shebang and os.path.basename(shebang[0]) == "env":
+        shebang = shebang[1:]
+    return shebang[0] if shebang else None
+
+
+@lru_cache(maxsize=32)
+def _has_json_report(python: str, workdir: str) -> bool:
+    """Whether ``python``, run from ``workdir``, can load pytest-json-report.
+    
+    Probed in the target environment rather than the agent's own, and
+    cached so each environment is checked once.
+    """
+    try:
+        probe = subprocess.run(
+            [python, "-c", "import pytest_jsonreport"],
+            cwd=workdir,
+            capture_output=True,
+            timeout=_PROBE_TIMEOUT,
+            check=False,
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return False
+    return probe.returncode == 0
+
+
+def _json_report_supported(cmd_parts: list[str], workdir: Path) -> bool:
+    """Whether a test command is pytest and its environment has pytest-json-report."""
+    if not _is_pytest_command(cmd_parts):
+        return False
+    python = _pytest_interpreter(cmd_parts, workdir)
+    return python is not None and _has_json_report(python, str(workdir))
+
+
+def _is_pytest_command(cmd_parts: list[str]) -> bool:
+    """Whether a command line invokes pytest directly or via ``-m pytest``."""
+    if not cmd_parts:
+        return False
+    if os.path.basename(cmd_parts[0]) in ("pytest", "py.test"):
+        return True
+    return cmd_parts[1:3] == ["-m", "pytest"]
+
+
 def _exec_run_tests(state: AgentState, proposal: Proposal) -> ExecResult:
-    """Execute a test run proposal."""
+    """Execute a test run proposal.
+    
+    Output is streamed line by line: failures are parsed as they appear and
+    only a bounded tail is retained, so large suites never sit in memory.
+    For pytest runs whose environment has pytest-json-report, failures come
+    from the JSON report instead of the text output.
+    """
     workdir = Path(state.repo.workdir)
     command = proposal.inputs.get("command", "pytest")
     
     cmd_parts = command.split() if isinstance(command, str) else command
     
     try:
-        result = subprocess.run(
-            cmd_parts,
-            cwd=workdir,
-            capture_output=True,
-            text=True,
-            timeout=300,
-            check=False,
-        )
-        
-        passed = result.returncode == 0
-        
-        if not passed:
-            failures = _extract_test_failures(result.stdout + result.stderr)
-            
-            from agent.types import TestFailure
-            state.last_failures = [
-                TestFailure(nodeid=f["nodeid"], message=f["message"])
-                for f in failures[:5]
-            ]
+        if _json_report_supported(cmd_parts, workdir):
+            with tempfile.TemporaryDirectory() as report_dir:
+                report_path = os.path.join(report_dir, "report.json")
+                returncode, failures, tail = _stream_test_command(
+                    [*cmd_parts, "--json-report", f"--json-report-file={report_path}"],
+                    workdir,
+                )
+                if os.path.exists(report_path):
+                    failures = _json_report_failures(report_path) or failures
+                run = returncode, failures, tail
         else:
-            state.last_failures = []
-        
-        return ExecResult(
-            status="ok" if passed else "fail",
-            summary=f"Tests {'passed' if passed else 'failed'}",
-            artifacts=[],
-            metrics={
-                "test_result": {
-                    "passed": passed,
-                    "returncode": result.returncode,
-                    "stdout_tail": result.stdout[-1000:] if result.stdout else "",
-                }
-            },
-        )
+            run = _stream_test_command(cmd_parts, workdir)
     except subprocess.TimeoutExpired:
         return ExecResult(status="fail", summary="Test run timed out (5 min)")
     except Exception as e:
         return ExecResult(status="fail", summary=f"Test run failed: {e}")
+    
+    returncode, failures, tail = run
+    passed = returncode == 0
+    
+    if not passed:
+        from agent.types import TestFailure
+        state.last_failures = [
+            TestFailure(nodeid=f["nodeid"], message=f["message"])
+            for f in failures
+        ]
+    else:
+        state.last_failures = []
+    
+    return ExecResult(
+        status="ok" if passed else "fail",
+        summary=f"Tests {'passed' if passed else 'failed'}",
+        artifacts=[],
+        metrics={
+            "test_result": {
+                "passed": passed,
+                "returncode": returncode,
+                "stdout_tail": tail,
+            }
+        },
+    )
 
 
-def _extract_test_failures(output: str) -> list[dict]:
-    """Extract detailed failure information from pytest output.
+def _stream_test_command(cmd_parts: list[str], workdir: Path) -> tuple[int, list[dict], str]:
+    """Run a test command, parsing failures from its output as it streams.
     
     Returns:
-        List of dictionaries with 'nodeid' and 'message' keys
+        Tuple of (returncode, failures, output tail)
+    
+    Raises:
+        subprocess.TimeoutExpired: if the run exceeds ``_TEST_TIMEOUT``
     """
+    proc = subprocess.Popen(
+        cmd_parts,
+        cwd=workdir,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+        errors="replace",
+        bufsize=1,
+    )
+    
+    timed_out = threading.Event()
+    
+    def _kill() -> None:
+        timed_out.set()
+        proc.kill()
+    
+    timer = threading.Timer(_TEST_TIMEOUT, _kill)
+    timer.start()
+    tail: deque[str] = deque(maxlen=50)
+    stdout = proc.stdout
+    assert stdout is not None  # stdout=PIPE
+    
+    def _tee() -> Iterator[str]:
+        for line in stdout:
+            tail.append(line)
+            yield line
+    
+    try:
+        failures = list(islice(_iter_test_failures(_tee()), _MAX_FAILURES))
+        # Keep draining so the child never blocks on a full pipe
+        for line in stdout:
+            tail.append(line)
+        returncode = proc.wait()
+    except BaseException:
+        proc.kill()
+        proc.wait()
+        raise
+    finally:
+        timer.cancel()
+        stdout.close()
+    
+    if timed_out.is_set():
+        raise subprocess.TimeoutExpired(cmd_parts, _TEST_TIMEOUT)
+    
+    return returncode, failures, "".join(tail)[-1000:]
+
+
+def _json_report_failures(report_path: str) -> list[dict]:
+    """Read failed tests from a pytest-json-report file."""
+    with open(report_path) as f:
+        report = json.load(f)
+    
     failures = []
-    lines = output.split("\n")
+    for test in report.get("tests", ()):
+        if test.get("outcome") not in ("failed", "error"):
+            continue
+        # The failing stage carries the crash details
+        stage: dict = next(
+            (test[s] for s in ("setup", "call", "teardown") if test.get(s, {}).get("outcome") == "failed"),
+            {},
+        )
+        crash = stage.get("crash") or {}
+        failures.append({
+            "nodeid": test["nodeid"],
+            "message": crash.get("message") or str(stage.get("longrepr", ""))[-1000:],
+        })
+        if len(failures) >= _MAX_FAILURES:
+            break
+    return failures
+
+
+def _iter_test_failures(lines: Iterable[str]) -> Iterator[dict]:
+    """Extract detailed failure information from pytest output lines.
+    
+    Failures are yielded as soon as they are complete, so callers can stop
+    consuming once they have enough.
     
+    Yields:
+        Dictionaries with 'nodeid' and 'message' keys
+    """
     current_test = None
     current_message = []
-    in_failure_block = False
+    found = False
+    bare_failed = []  # FAILED lines without a node id, for the fallback
     
-    for i, line in enumerate(lines):
+    for line in lines:
         # Detect FAILED lines
         if "FAILED" in line and "::" in line:
-            # Save previous failure
+            # Emit previous failure
             if current_test:
-                failures.append({
+                found = True
+                yield {
                     "nodeid": current_test,
                     "message": "\n".join(current_message[-10:])  # Last 10 lines
-                })
+                }
             
             # Extract test name
             parts = line.split()
@@ -1344,10 +1982,13 @@ def _extract_test_failures(output: str) -> list[dict]:
                     current_test = part.strip()
                     break
             current_message = []
-            in_failure_block = True
+            continue
+        
+        if "FAILED" in line and not found:
+            bare_failed.append(line.strip())
         
         # Capture assertion errors
-        elif "AssertionError" in line or "assert " in line.lower():
+        if "AssertionError" in line or "assert " in line.lower():
             current_message.append(line.strip())
         
         # Capture error lines
@@ -1360,21 +2001,16 @@ def _extract_test_failures(output: str) -> list[dict]:
     
     # Don't forget the last failure
     if current_test:
-        failures.append({
+        found = True
+        yield {
             "nodeid": current_test,
             "message": "\n".join(current_message[-10:])
-        })
+        }
     
     # Fallback: simple FAILED line extraction
-    if not failures:
-        for line in lines:
-            if "FAILED" in line:
-                failures.append({
-                    "nodeid": line.strip(),
-                    "message": line.strip()
-                })
-    
-    return failures
+    if not found:
+        for line in bare_failed:
+            yield {"nodeid": line, "message": line}
 
 
 def _exec_finalize(state: AgentState, proposal: Proposal) -> ExecResult:
@@ -18,7 +18,7 @@ import time
 
 from .types import AgentState, Proposal, GateDecision, ExecResult, LedgerEvent, Phase
 from .profiles import Profile
-from memory.log import append_event
+from memory.log import append_event, flush_events
 
 try:
     from rfsn_controller.structured_logging import get_logger
@@ -173,6 +173,10 @@ def run_episode(
         # 4. UPDATE STATE: Track budgets and touched files
         if proposal.kind == "run_tests":
             state.budget.test_runs += 1
+        elif proposal.kind == "batch":
+            state.budget.test_runs += sum(
+                1 for op in proposal.inputs.get("ops", []) if op.get("kind") == "run_tests"
+            )
         
         if proposal.kind == "edit":
             state.budget.patch_attempts += 1
@@ -192,7 +196,7 @@ def run_episode(
                 except Exception as e:
                     logger.debug("Outcome learning disabled", reason=str(e))
         
-        if proposal.kind in ["inspect", "search", "edit", "run_tests"]:
+        if proposal.kind in ["inspect", "search", "edit", "run_tests", "batch"]:
             state.budget.model_calls += 1
         
         # 5. LOG: Append to ledger
@@ -227,6 +231,7 @@ def run_episode(
         )
     
     episode_duration = time.time() - episode_start
+    flush_events(state)
     
     logger.info(
         "Episode complete",
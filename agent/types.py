@@ -13,6 +13,7 @@ All learning lives OUTSIDE these contracts. The gate is deterministic.
 
 from __future__ import annotations
 
+from collections import deque
 from dataclasses import dataclass, field
 from enum import Enum
 from typing import Any, Dict, List, Optional, Tuple, Literal
@@ -53,7 +54,9 @@ class Phase(str, Enum):
 # Proposal contract (planner emits exactly this)
 # =========================
 
-ProposalKind = Literal["inspect", "search", "edit", "run_tests", "finalize"]
+# "batch" carries several inspect/search/run_tests ops in inputs["ops"],
+# each a {"kind": ..., "inputs": {...}} dict gated and executed in one round.
+ProposalKind = Literal["inspect", "search", "edit", "run_tests", "finalize", "batch"]
 
 
 @dataclass(frozen=True)
@@ -150,12 +153,20 @@ class ExecResult:
 # Test results (structured)
 # =========================
 
+SHORT_MESSAGE_LEN = 100
+
+
 @dataclass(frozen=True)
 class TestFailure:
     """A single test failure."""
     nodeid: str  # pytest node ID
     message: str
     traceback: Optional[str] = None
+    short_message: str = ""  # Prompt-sized prefix of message, filled at capture time
+
+    def __post_init__(self) -> None:
+        if not self.short_message and self.message:
+            object.__setattr__(self, "short_message", self.message[:SHORT_MESSAGE_LEN])
 
 
 @dataclass(frozen=True)
@@ -256,6 +267,9 @@ class BudgetState:
     model_calls: int = 0
 
 
+ACTION_HISTORY_MAXLEN = 128
+
+
 @dataclass
 class AgentState:
     """Complete agent state snapshot.
@@ -275,3 +289,8 @@ class AgentState:
     
     # Scratch space for planner state
     notes: Dict[str, Any] = field(default_factory=dict)
+
+    def __post_init__(self) -> None:
+        # Planners append to this on every proposal; bound it so long
+        # sessions don't grow it without limit (only the tail is read).
+        self.notes.setdefault("action_history", deque(maxlen=ACTION_HISTORY_MAXLEN))
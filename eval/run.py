@@ -19,19 +19,42 @@ import json
 import shutil
 import subprocess
 import time
-from dataclasses import dataclass, field
+from dataclasses import asdict, dataclass, field, is_dataclass
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
 from agent.loop import run_episode
 from agent.profiles import Profile, load_profile
 from agent.types import AgentState, Phase, Proposal
-from memory.log import append_event
+from memory.log import append_event, flush_events
 from rfsn_controller.structured_logging import get_logger
 
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
 logger = get_logger(__name__)
 
 
+def _json_default(obj: Any) -> Any:
+    if is_dataclass(obj) and not isinstance(obj, type):
+        return asdict(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _json_bytes(obj: Any, indent: bool = False) -> bytes:
+    """Serialize to UTF-8 JSON, via orjson when it is installed.
+    
+    Dataclasses such as ``EvalResult`` can be passed directly: orjson
+    encodes their fields natively without building an intermediate dict.
+    """
+    if HAS_ORJSON:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+    return json.dumps(obj, indent=2 if indent else None, default=_json_default).encode()
+
+
 def setup_repo(task: SWEBenchTask, workdir: Path) -> bool:
     """Clone and checkout repository for a SWE-bench task.
     
@@ -371,51 +394,78 @@ class EvalRunner:
                 tests_failed=0,
                 error_message=str(e),
             )
+        finally:
+            flush_events(state)
     
-    async def run_batch(self, tasks: List[SWEBenchTask]) -> List[EvalResult]:
+    async def run_batch(
+        self,
+        tasks: list[SWEBenchTask],
+        run_id: str | None = None,
+    ) -> list[EvalResult]:
         """Run a batch of tasks.
         
         Args:
             tasks: List of tasks to run
+            run_id: If given, each result is appended to the run's results
+                file as soon as its task finishes, so an interrupted run
+                keeps its finished tasks
             
         Returns:
-            List of evaluation results
+            List of evaluation results, in task order
         """
-        results = []
+        results_file = None
+        if run_id is not None:
+            results_file = self.config.results_dir / f"{run_id}_results.jsonl"
+            results_file.write_bytes(b"")
+        
+        results: list[EvalResult | None] = [None] * len(tasks)
         
         if self.config.parallel_tasks > 1:
             # Parallel execution
             semaphore = asyncio.Semaphore(self.config.parallel_tasks)
             
-            async def run_with_semaphore(task: SWEBenchTask) -> EvalResult:
-                async with semaphore:
-                    return await self.run_task(task)
-            
-            tasks_coros = [run_with_semaphore(task) for task in tasks]
-            raw_results = await asyncio.gather(*tasks_coros, return_exceptions=True)
-            
-            # Convert exceptions to failed results
-            for i, result in enumerate(raw_results):
-                if isinstance(result, BaseException):
-                    results.append(EvalResult(
-                        task_id=tasks[i].task_id,
+            async def run_with_semaphore(i: int, task: SWEBenchTask) -> tuple[int, EvalResult]:
+                try:
+                    async with semaphore:
+                        return i, await self.run_task(task)
+                except Exception as e:
+                    # Convert exceptions to failed results
+                    return i, EvalResult(
+                        task_id=task.task_id,
                         success=False,
                         resolution_time=0.0,
                         steps_taken=0,
                         patches_tried=0,
                         tests_passed=0,
                         tests_failed=0,
-                        error_message=str(result),
-                    ))
-                else:
-                    results.append(result)
+                        error_message=str(e),
+                    )
+            
+            # Schedule up front so tasks claim the semaphore in task order
+            pending = [
+                asyncio.ensure_future(run_with_semaphore(i, task))
+                for i, task in enumerate(tasks)
+            ]
+            for coro in asyncio.as_completed(pending):
+                i, result = await coro
+                results[i] = result
+                if results_file is not None:
+                    self._append_result(results_file, result)
         else:
             # Serial execution
-            for task in tasks:
+            for i, task in enumerate(tasks):
                 result = await self.run_task(task)
-                results.append(result)
+                results[i] = result
+                if results_file is not None:
+                    self._append_result(results_file, result)
         
-        return results
+        return results  # type: ignore[return-value]
+    
+    @staticmethod
+    def _append_result(results_file: Path, result: EvalResult) -> None:
+        """Append one result line to a results JSONL file."""
+        with open(results_file, "ab") as f:
+            f.write(_json_bytes(result) + b"\n")
     
     def save_results(self, results: List[EvalResult], run_id: str):
         """Save evaluation results to disk.
@@ -424,30 +474,52 @@ class EvalRunner:
             results: List of evaluation results
             run_id: Unique identifier for this run
         """
-        # Save individual results
+        # Save individual results as one buffer and a single write
         results_file = self.config.results_dir / f"{run_id}_results.jsonl"
-        with open(results_file, "w") as f:
-            for result in results:
-                f.write(json.dumps(result.to_dict()) + "\n")
+        results_file.write_bytes(
+            b"".join(_json_bytes(result) + b"\n" for result in results)
+        )
+        logger.info(f"Saved results to {results_file}")
+        
+        self.save_summary(results, run_id)
+    
+    def save_summary(self, results: list[EvalResult], run_id: str):
+        """Save the aggregate summary of a run.
+        
+        Args:
+            results: List of evaluation results
+            run_id: Unique identifier for this run
+        """
+        # Aggregate in a single pass over the results
+        successful = 0
+        total_time = 0.0
+        total_steps = total_patches = total_llm_calls = total_llm_tokens = 0
+        for r in results:
+            successful += r.success
+            total_time += r.resolution_time
+            total_steps += r.steps_taken
+            total_patches += r.patches_tried
+            total_llm_calls += r.llm_calls
+            total_llm_tokens += r.llm_tokens
         
-        # Save summary
+        n = len(results)
         summary = {
             "run_id": run_id,
-            "total_tasks": len(results),
-            "successful_tasks": sum(1 for r in results if r.success),
-            "failed_tasks": sum(1 for r in results if not r.success),
-            "total_time": sum(r.resolution_time for r in results),
-            "avg_steps": sum(r.steps_taken for r in results) / len(results),
-            "avg_patches": sum(r.patches_tried for r in results) / len(results),
-            "total_llm_calls": sum(r.llm_calls for r in results),
-            "total_llm_tokens": sum(r.llm_tokens for r in results),
+            "total_tasks": n,
+            "successful_tasks": successful,
+            "failed_tasks": n - successful,
+            "total_time": total_time,
+            "avg_steps": total_steps / n if n else 0.0,
+            "avg_patches": total_patches / n if n else 0.0,
+            "total_llm_calls": total_llm_calls,
+            "total_llm_tokens": total_llm_tokens,
         }
         
         summary_file = self.config.results_dir / f"{run_id}_summary.json"
-        with open(summary_file, "w") as f:
-            json.dump(summary, f, indent=2)
+        with open(summary_file, "wb") as f:
+            f.write(_json_bytes(summary, indent=True))
         
-        logger.info(f"Saved results to {results_file}")
+        logger.info(f"Saved summary to {summary_file}")
         logger.info(f"Success rate: {summary['successful_tasks']}/{summary['total_tasks']}")
 
 
@@ -468,11 +540,11 @@ async def run_eval(config: EvalConfig) -> List[EvalResult]:
     
     logger.info(f"Loaded {len(tasks)} tasks from {config.dataset}")
     
-    # Run tasks
-    results = await runner.run_batch(tasks)
-    
-    # Save results
+    # Run tasks, streaming each result to disk as it finishes
     run_id = f"{config.dataset}_{int(time.time())}"
-    runner.save_results(results, run_id)
+    results = await runner.run_batch(tasks, run_id=run_id)
+    
+    # Save summary
+    runner.save_summary(results, run_id)
     
     return results
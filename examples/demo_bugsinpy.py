@@ -6,12 +6,24 @@ These are MUCH harder than QuixBugs - real production bugs!
 """
 
 import asyncio
+import json
 import os
+import re
 import sys
+from functools import lru_cache
 from pathlib import Path
 
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+# orjson.JSONDecodeError subclasses json.JSONDecodeError, so one except clause covers both
+_json_loads = orjson.loads if HAS_ORJSON else json.loads
+
 
 BUGSINPY_DIR = Path(__file__).parent / "bugsinpy_demo" / "projects"
 
@@ -47,6 +59,7 @@ DEMO_BUGS = [
 ]
 
 
+@lru_cache(maxsize=512)
 def load_patch(project: str, bug_id: str) -> str:
     """Load the bug patch diff."""
     patch_file = BUGSINPY_DIR / project / "bugs" / bug_id / "bug_patch.txt"
@@ -55,8 +68,9 @@ def load_patch(project: str, bug_id: str) -> str:
     return ""
 
 
+@lru_cache(maxsize=512)
 def load_bug_info(project: str, bug_id: str) -> dict:
-    """Load bug metadata."""
+    """Load bug metadata (cached; treat the returned dict as read-only)."""
     info_file = BUGSINPY_DIR / project / "bugs" / bug_id / "bug.info"
     info = {}
     if info_file.exists():
@@ -67,33 +81,29 @@ def load_bug_info(project: str, bug_id: str) -> dict:
     return info
 
 
+# Diff line classes, matched per line in C instead of chained startswith calls
+_HUNK_START = re.compile(r"^@@", re.MULTILINE)
+_BUGGY_LINE = re.compile(r"^(?: |-(?!--))(.*)$", re.MULTILINE)  # Context or removed line
+_FIX_LINE = re.compile(r"^(?!\+\+\+|---)[-+].*$", re.MULTILINE)  # Added or removed line
+
+
 def extract_buggy_code(patch: str) -> str:
     """Extract the buggy version from a patch."""
-    lines = []
-    in_diff = False
-    for line in patch.split("\n"):
-        if line.startswith("@@"):
-            in_diff = True
-            continue
-        if in_diff:
-            if line.startswith("-") and not line.startswith("---"):
-                lines.append(line[1:])  # Buggy line
-            elif line.startswith("+") and not line.startswith("+++"):
-                pass  # Skip fixed lines
-            elif line.startswith(" "):
-                lines.append(line[1:])  # Context
-    return "\n".join(lines)
+    hunk = _HUNK_START.search(patch)
+    if hunk is None:
+        return ""
+    return "\n".join(_BUGGY_LINE.findall(patch, hunk.start()))
 
 
+@lru_cache(maxsize=512)
 def extract_fix(patch: str) -> str:
     """Extract just the fix from a patch."""
-    fixes = []
-    for line in patch.split("\n"):
-        if line.startswith("+") and not line.startswith("+++"):
-            fixes.append(line)
-        elif line.startswith("-") and not line.startswith("---"):
-            fixes.append(line)
-    return "\n".join(fixes)
+    return "\n".join(_FIX_LINE.findall(patch))
+
+
+# ANSI colors for removed (red) and added (green) diff lines
+DIFF_COLORS = {"-": "\033[91m", "+": "\033[92m"}
+RESET = "\033[0m"
 
 
 def demo_bugsinpy():
@@ -128,13 +138,16 @@ def demo_bugsinpy():
         # Show the fix
         fix = extract_fix(patch)
         print(f"\n   📋 Fix Preview:")
-        for line in fix.split("\n")[:8]:
-            if line.startswith("-"):
-                print(f"      \033[91m{line}\033[0m")  # Red
-            elif line.startswith("+"):
-                print(f"      \033[92m{line}\033[0m")  # Green
-        if len(fix.split("\n")) > 8:
-            print(f"      ... ({len(fix.split(chr(10)))} lines total)")
+        # Split off only the preview lines; count the rest without a list
+        preview = "".join(
+            f"      {DIFF_COLORS[line[0]]}{line}{RESET}\n"
+            for line in fix.split("\n", 8)[:8]
+            if line[:1] in DIFF_COLORS
+        )
+        nlines = fix.count("\n") + 1
+        if nlines > 8:
+            preview += f"      ... ({nlines} lines total)\n"
+        sys.stdout.write(preview)
     
     print(f"\n{'=' * 70}")
     print("📊 Summary: BugsInPy has 493 bugs across 17 projects")
@@ -181,9 +194,8 @@ Provide ONLY the corrected Python code lines. No explanations, no tool requests,
         content = response.content if hasattr(response, 'content') else str(response)
         
         # Try to parse JSON response (RFSN controller format)
-        import json
         try:
-            data = json.loads(content)
+            data = _json_loads(content)
             if isinstance(data, dict) and "diff" in data:
                 # Extract diff from patch response
                 diff_content = data["diff"]
@@ -197,7 +209,7 @@ Provide ONLY the corrected Python code lines. No explanations, no tool requests,
                         print(f"      {line[:70]}")
                 
                 # Check for key fix pattern - both ground truth and alternative valid fixes
-                actual_fix = extract_fix(patch)
+                fix_lines = extract_fix(patch).split("\n")
                 # Ground truth uses [^"]+, but many alternatives also work
                 if '[^"]+' in diff_content or "([^" in diff_content:
                     print("   ✅ LLM matches ground truth regex fix!")
@@ -205,7 +217,7 @@ Provide ONLY the corrected Python code lines. No explanations, no tool requests,
                          r'[a-zA-Z0-9_-]+', r'[a-zA-Z-]+', r'[\w-]+']):
                     print("   ✅ LLM found valid alternative fix (expanded character class)!")
                 elif any(fix_line.lstrip("+").strip() in diff_content 
-                       for fix_line in actual_fix.split("\n") 
+                       for fix_line in fix_lines 
                        if fix_line.startswith("+")):
                     print("   ✅ LLM identified key parts of the fix!")
                 else:
@@ -5,18 +5,61 @@ This demonstrates the core fix loop without the full controller.
 """
 
 import asyncio
+import contextlib
+import hashlib
+import io
+import json
+import multiprocessing
 import os
+import re
 import subprocess
 import sys
+from functools import lru_cache
 from pathlib import Path
 
+from rfsn_controller.llm.async_client import SemanticLLMCache
+from rfsn_controller.llm.deepseek import async_client_session
+from rfsn_controller.prompt_compression import estimate_tokens, summarize_traceback
+from rfsn_controller.streaming_validator import StreamingValidator
+
 sys.path.insert(0, str(Path(__file__).parent))
 
+# Responses persist across runs so retries on the same repo skip the LLM
+LLM_CACHE_DIR = Path.home() / ".cache" / "rfsn" / "fix_demo"
+
+# Seconds before a hung test run is killed
+PYTEST_TIMEOUT = 60
+
+# Upper bound on in-flight LLM requests
+LLM_CONCURRENCY = 8
+
+# Files sent together in one request, so the shared instructions and test
+# failures are prefilled once per batch rather than once per file
+LLM_BATCH_SIZE = 8
+
+# First "-<start>" in a hunk header such as "@@ -5,7 +5,7 @@"
+_HUNK_START_RE = re.compile(r"-(\d+)")
+
+# Body of the first ```python fenced block in a response
+_CODE_BLOCK_RE = re.compile(r"```python\n(.*?)```", re.DOTALL)
+
+# ANSI colours for removed / added diff lines
+_DIFF_COLOURS = {"-": "\033[91m", "+": "\033[92m"}
+
+# Token budget for the test-failure context in each prompt
+FAILURE_CONTEXT_TOKENS = 800
+
+_ANSI_RE = re.compile(r"\x1b\[[0-9;]*m")
+
+# "____ test_add ____" headers that open each failure/error block
+_FAILURE_HEADER_RE = re.compile(r"^_{5,} ", re.MULTILINE)
+
+# "==== short test summary info ====" style section rules
+_SECTION_RULE_RE = re.compile(r"^=+ .* =+$|^!+ .* !+$", re.MULTILINE)
+
 
 async def run_fix_demo(repo_dir: str):
     """Run the fix demo on a repository."""
-    from rfsn_controller.llm.async_client import call_deepseek_async
-    
     repo_path = Path(repo_dir)
     
     print("\n" + "=" * 70)
@@ -26,131 +69,90 @@ async def run_fix_demo(repo_dir: str):
     
     # Step 1: Run tests to find failures
     print("\n📋 Step 1: Running tests to find failures...")
-    result = subprocess.run(
-        ["python3", "-m", "pytest", "-v", "--tb=short"],
-        cwd=repo_path,
-        capture_output=True,
-        text=True,
-        timeout=60,
-    )
+    returncode, test_output, failures = run_pytest(repo_path)
     
-    if result.returncode == 0:
+    if returncode == 0:
         print("   ✅ All tests pass! No fixes needed.")
         return
     
     print(f"   ❌ Tests failed!")
     
-    # Extract test failures
-    failures = []
-    for line in result.stdout.split("\n"):
-        if "FAILED" in line:
-            failures.append(line.strip())
-    
     for f in failures[:3]:
         print(f"      → {f}")
     
     # Step 2: Read the source files
     print("\n📖 Step 2: Reading source code...")
     source_files = {}
-    for py_file in repo_path.glob("*.py"):
-        if not py_file.name.startswith("test_"):
-            source_files[py_file.name] = py_file.read_text()
-            print(f"   → {py_file.name} ({len(py_file.read_text().split(chr(10)))} lines)")
+    with os.scandir(repo_path) as entries:
+        for entry in entries:
+            if entry.name.endswith(".py") and not entry.name.startswith("test_") and entry.is_file():
+                text = Path(entry.path).read_text()
+                source_files[entry.name] = text
+                print(f"   → {entry.name} ({text.count(chr(10)) + 1} lines)")
     
     # Step 3: Ask LLM to fix
     print("\n🤖 Step 3: Asking LLM for fixes...")
+    failure_context = extract_failure_context(test_output)
+    llm_cache = SemanticLLMCache(str(LLM_CACHE_DIR))
+    sem = asyncio.Semaphore(LLM_CONCURRENCY)
+    # Abort generations that can't yield a usable fix: anything that doesn't
+    # open like code or JSON, and JSON that has no "files" by 256 chars
+    validator = StreamingValidator(
+        valid_patterns=[r'"files"\s*:', r'"diff"\s*:', r"```python", r"^\s*(?:# |def |import |class )"],
+        prefix_pattern=r"(?:```python|# |def |import |class |\{)",
+        json_key='"files"',
+        json_key_window=256,
+    )
     
-    for filename, content in source_files.items():
-        prompt = f"""Fix all bugs in this Python code. The tests are failing.
-
-CRITICAL: Return ONLY the complete fixed Python code. NO JSON. NO tool requests. Just raw Python code.
-
-Test failures:
-{result.stdout[-1500:]}
-
-Current buggy code ({filename}):
-```python
-{content}
-```
-
-Looking at the test failures:
-- test_add fails: add(2, 3) returns -1 instead of 5 → the function does subtraction instead of addition
-- test_factorial fails: factorial(5) causes recursion error → recursive call is wrong
-
-Return the COMPLETE FIXED FILE. Start with "# Calculator module" and give me the entire corrected Python code:"""
-
+    async def fix_batch(batch: list[tuple[str, str]]) -> None:
+        prompt = build_batch_prompt(batch, failure_context)
+        
         try:
-            response = await call_deepseek_async(
-                prompt,
-                model="deepseek-chat",
-                temperature=0.0,
-            )
-            
-            # Parse response
-            import json
-            import re
-            response_content = response.content if hasattr(response, 'content') else str(response)
-            
-            fixed_code = None
-            
-            # Try to extract code from various response formats
-            try:
-                data = json.loads(response_content)
-                if "diff" in data:
-                    # Parse the diff
-                    diff_content = data["diff"]
-                    print(f"\n   📝 LLM provided patch for {filename}:")
-                    
-                    # Show some of the diff
-                    for line in diff_content.split("\\n")[:6]:
-                        if line.startswith("-") and not line.startswith("---"):
-                            print(f"      \033[91m{line}\033[0m")
-                        elif line.startswith("+") and not line.startswith("+++"):
-                            print(f"      \033[92m{line}\033[0m")
-                    
-                    # Apply the diff
-                    fixed_code = apply_diff_to_content(content, diff_content)
-            except json.JSONDecodeError:
-                pass
-            
-            # Check for raw Python code
-            if not fixed_code:
-                # Try to extract code from markdown blocks
-                code_match = re.search(r'```python\n(.*?)```', response_content, re.DOTALL)
-                if code_match:
-                    fixed_code = code_match.group(1)
-                elif response_content.strip().startswith(("def ", "# ", "import ", "class ")):
-                    fixed_code = response_content
-            
-            if fixed_code and len(fixed_code.strip()) > 50:
-                # Validate it looks like Python
-                try:
-                    compile(fixed_code, "<string>", "exec")
-                    (repo_path / filename).write_text(fixed_code)
-                    print(f"   ✅ Applied LLM fix to {filename}")
-                except SyntaxError as e:
-                    print(f"   ⚠️  Fix has syntax error: {e}")
-            else:
-                print(f"   ⚠️  Could not extract valid fix from response")
-                    
+            # Near-duplicate prompts only match for the same file contents
+            digest = hashlib.sha256("\0".join(c for _, c in batch).encode()).hexdigest()[:16]
+            async with sem:
+                response = await llm_cache.call(
+                    prompt,
+                    scope=f"{','.join(f for f, _ in batch)}:{digest}",
+                    model="deepseek-chat",
+                    temperature=0.0,
+                    client=client,
+                    validator=validator,
+                )
         except Exception as e:
             print(f"   ❌ LLM error: {e}")
+            return
+        
+        response_content = response.content if hasattr(response, 'content') else str(response)
+        sections = split_batch_response(response_content, [f for f, _ in batch])
+        
+        for filename, content in batch:
+            try:
+                apply_fix(repo_path, filename, content, sections.get(filename, "").strip())
+            except Exception as e:
+                print(f"   ❌ Could not apply fix to {filename}: {e}")
+    
+    # Batches are independent, so their LLM round-trips overlap; one
+    # run-scoped client keeps the connections warm across all of them
+    items = list(source_files.items())
+    batches = [items[i:i + LLM_BATCH_SIZE] for i in range(0, len(items), LLM_BATCH_SIZE)]
+    async with async_client_session() as client:
+        await asyncio.gather(*(fix_batch(batch) for batch in batches))
+    llm_cache.close()
     
     # Step 4: Re-run tests
     print("\n🧪 Step 4: Re-running tests...")
-    result = subprocess.run(
-        ["python3", "-m", "pytest", "-v", "--tb=short"],
-        cwd=repo_path,
-        capture_output=True,
-        text=True,
-        timeout=60,
-    )
+    # Re-run only what failed in Step 1 (pytest's last-failed cache); the
+    # full suite only runs as the final gate once those pass
+    returncode, _, remaining = run_pytest(repo_path, "--lf")
+    if returncode == 0:
+        returncode, _, remaining = run_pytest(repo_path)
     
-    if result.returncode == 0:
+    if returncode == 0:
         print("   ✅ All tests now pass!")
     else:
         # Count improvements
-        new_failures = sum(1 for line in result.stdout.split("\n") if "FAILED" in line)
+        new_failures = len(remaining)
         old_failures = len(failures)
         if new_failures < old_failures:
             print(f"   📈 Progress: {old_failures} → {new_failures} failures")
@@ -160,9 +162,279 @@ Return the COMPLETE FIXED FILE. Start with "# Calculator module" and give me the
     print("\n" + "=" * 70)
 
 
+@lru_cache(maxsize=1)
+def _token_encoding():
+    """tiktoken's cl100k encoding, or None if it can't be loaded."""
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        # Not installed, or the BPE file can't be fetched offline
+        return None
+
+
+def _count_tokens(text: str) -> int:
+    encoding = _token_encoding()
+    if encoding is None:
+        return estimate_tokens(text)
+    return len(encoding.encode(text))
+
+
+def extract_failure_context(output: str, max_tokens: int = FAILURE_CONTEXT_TOKENS) -> str:
+    """Slim pytest output down to its failure blocks, within a token budget.
+    
+    Keeps the per-test traceback blocks (ANSI codes and section rules
+    stripped, each condensed to the test name, the last few frames and
+    the ``E`` lines) and adds whole blocks until ``max_tokens`` would be
+    exceeded. Falls back to the tail of the output if it has no blocks.
+    """
+    text = _ANSI_RE.sub("", output)
+    blocks = [
+        summarize_traceback(_SECTION_RULE_RE.split(block, maxsplit=1)[0].strip())
+        for block in _FAILURE_HEADER_RE.split(text)[1:]
+    ]
+    if not blocks:
+        return text[-1500:]
+    
+    kept: list[str] = []
+    used = 0
+    for block in blocks:
+        tokens = _count_tokens(block)
+        if kept and used + tokens > max_tokens:
+            break
+        kept.append(block)
+        used += tokens
+    return "\n\n".join(kept)
+
+
+class ResultCollector:
+    """pytest plugin that records every test report of an in-process run."""
+    
+    def __init__(self):
+        self.reports = []
+    
+    def pytest_runtest_logreport(self, report):
+        self.reports.append(report)
+    
+    def pytest_collectreport(self, report):
+        # Import errors surface here, never as per-test reports
+        if report.failed:
+            self.reports.append(report)
+    
+    @property
+    def failed(self) -> list[str]:
+        """Node ids that failed to collect or failed in any phase, in report order."""
+        return list(dict.fromkeys(r.nodeid for r in self.reports if r.failed))
+
+
+def _repo_python(repo_path: Path) -> Path | None:
+    """The repo's own virtualenv interpreter, if it has one."""
+    for venv in (".venv", "venv"):
+        python = repo_path / venv / "bin" / "python"
+        if python.exists():
+            return python
+    return None
+
+
+def build_batch_prompt(batch: list[tuple[str, str]], failure_context: str) -> str:
+    """Prompt asking for every file of ``batch`` back as JSON keyed by filename."""
+    files = "\n\n".join(
+        f"### {filename}\n```python\n{content}\n```" for filename, content in batch
+    )
+    return f"""Fix all bugs in this Python code. The tests are failing.
+
+CRITICAL: Return ONLY a JSON object. NO tool requests. NO explanations.
+
+Test failures:
+{failure_context}
+
+Current buggy code, one section per file:
+{files}
+
+Looking at the test failures:
+- test_add fails: add(2, 3) returns -1 instead of 5 → the function does subtraction instead of addition
+- test_factorial fails: factorial(5) causes recursion error → recursive call is wrong
+
+Return {{"files": {{"<filename>": "<complete fixed file>", ...}}}} with the COMPLETE FIXED FILE
+for every file above, keyed by its filename:"""
+
+
+def apply_fix(repo_path: Path, filename: str, content: str, response_content: str) -> None:
+    """Extract a fixed file from one LLM answer and write it if it compiles.
+    
+    Accepts a compiling ```python block, a JSON ``diff`` against
+    ``content``, or raw Python source, in that order of preference.
+    """
+    fixed_code = None
+    
+    # A complete file in a ```python block that already compiles is
+    # used as-is; diff parsing would be dead work
+    code_match = _CODE_BLOCK_RE.search(response_content)
+    compiled = False
+    if code_match:
+        try:
+            compile(code_match.group(1), "<string>", "exec")
+            fixed_code = code_match.group(1)
+            compiled = True
+        except SyntaxError:
+            pass
+    
+    # Otherwise try to extract code from various response formats
+    if not fixed_code:
+        fixed_code = _fix_from_diff(filename, content, response_content)
+    
+    # Check for raw Python code
+    if not fixed_code:
+        if code_match:
+            fixed_code = code_match.group(1)
+        elif response_content.strip().startswith(("def ", "# ", "import ", "class ")):
+            fixed_code = response_content
+    
+    if fixed_code and len(fixed_code.strip()) > 50:
+        # Validate it looks like Python
+        try:
+            if not compiled:
+                compile(fixed_code, "<string>", "exec")
+            (repo_path / filename).write_text(fixed_code)
+            print(f"   ✅ Applied LLM fix to {filename}")
+        except SyntaxError as e:
+            print(f"   ⚠️  Fix has syntax error: {e}")
+    else:
+        print(f"   ⚠️  Could not extract valid fix from response")
+
+
+def _fix_from_diff(filename: str, content: str, response_content: str) -> str | None:
+    """Apply a JSON ``{"diff": ...}`` answer to ``content``; None if there is none."""
+    try:
+        data = json.loads(response_content)
+    except json.JSONDecodeError:
+        return None
+    diff_content = data.get("diff") if isinstance(data, dict) else None
+    if not diff_content:
+        return None
+    
+    print(f"\n   📝 LLM provided patch for {filename}:")
+    
+    # Show some of the diff
+    for line in diff_content.replace("\\n", "\n").splitlines()[:6]:
+        if line.startswith(("---", "+++")):
+            continue
+        colour = _DIFF_COLOURS.get(line[:1])
+        if colour:
+            print(f"      {colour}{line}\033[0m")
+    
+    return apply_diff_to_content(content, diff_content)
+
+
+def split_batch_response(response_content: str, filenames: list[str]) -> dict[str, str]:
+    """Map each filename to the part of a batched response that fixes it.
+    
+    Batches are requested in JSON mode as ``{"files": {name: fixed_file}}``.
+    Each file comes back in a form ``apply_fix`` understands: complete files
+    as a ```python block, per-file objects (e.g. ``{"diff": ...}``) as JSON.
+    A single-file batch falls back to the whole response.
+    """
+    try:
+        data = json.loads(response_content)
+    except json.JSONDecodeError:
+        data = None
+    files = data.get("files") if isinstance(data, dict) else None
+    if isinstance(files, dict):
+        sections = {}
+        for name in filenames:
+            fix = files.get(name)
+            if isinstance(fix, str):
+                if not fix.lstrip().startswith("```"):
+                    # Fence the file as-is; only add a newline if it lacks one
+                    newline = "" if fix.endswith("\n") else "\n"
+                    fix = f"```python\n{fix}{newline}```"
+                sections[name] = fix
+            elif isinstance(fix, dict):
+                sections[name] = json.dumps(fix)
+        return sections
+    if len(filenames) == 1:
+        return {filenames[0]: response_content}
+    return {}
+
+
+def _evict_repo_modules(root: str) -> None:
+    """Drop modules loaded from under ``root`` out of ``sys.modules``."""
+    prefix = root.rstrip(os.sep) + os.sep
+    for name, module in list(sys.modules.items()):
+        if (getattr(module, "__file__", None) or "").startswith(prefix):
+            del sys.modules[name]
+
+
+def _pytest_child(conn, repo_path: Path, extra_args: tuple[str, ...]) -> None:
+    """Run pytest in a forked child and send the result back over ``conn``."""
+    import pytest
+    
+    # The fork inherits anything this interpreter imported from the repo;
+    # drop it so the run tests the code currently on disk
+    root = str(repo_path.resolve())
+    _evict_repo_modules(root)
+    
+    collector = ResultCollector()
+    output = io.StringIO()
+    os.chdir(repo_path)
+    with contextlib.redirect_stdout(output):
+        code = pytest.main(["-v", "--tb=short", *extra_args, root], plugins=[collector])
+    conn.send((int(code), output.getvalue(), collector.failed))
+    conn.close()
+
+
+def run_pytest(repo_path: Path, *extra_args: str) -> tuple[int, str, list[str]]:
+    """Run the repo's tests; returns (exit code, output, failed node ids).
+    
+    ``extra_args`` are passed through to pytest (e.g. ``--lf``).
+    
+    Runs ``pytest.main`` in a child forked from this interpreter, so
+    repeated runs skip interpreter and plugin startup and failures come
+    from structured reports instead of scraped output. Repos with their
+    own virtualenv, or platforms without ``fork``, get a subprocess.
+    Either way a run that exceeds ``PYTEST_TIMEOUT`` seconds is killed
+    and raises ``subprocess.TimeoutExpired``.
+    """
+    python = _repo_python(repo_path)
+    if python is not None or "fork" not in multiprocessing.get_all_start_methods():
+        cmd = [str(python or sys.executable), "-m", "pytest", "-v", "--tb=short", "-rf", *extra_args]
+        result = subprocess.run(
+            cmd,
+            cwd=repo_path,
+            capture_output=True,
+            text=True,
+            timeout=PYTEST_TIMEOUT,
+        )
+        failed = [
+            line.split()[1] for line in result.stdout.splitlines()
+            if line.startswith("FAILED ") and len(line.split()) > 1
+        ]
+        return result.returncode, result.stdout, failed
+    
+    ctx = multiprocessing.get_context("fork")
+    receiver, sender = ctx.Pipe(duplex=False)
+    child = ctx.Process(target=_pytest_child, args=(sender, repo_path, extra_args), daemon=True)
+    child.start()
+    sender.close()
+    try:
+        if not receiver.poll(PYTEST_TIMEOUT):
+            raise subprocess.TimeoutExpired(["pytest", *extra_args], PYTEST_TIMEOUT)
+        try:
+            return receiver.recv()
+        except EOFError:
+            child.join()
+            return 1, f"pytest child exited with code {child.exitcode}", []
+    finally:
+        receiver.close()
+        if child.is_alive():
+            child.kill()
+        child.join()
+
+
 def apply_diff_to_content(original: str, diff: str) -> str:
     """Apply a unified diff to content and return the complete fixed file."""
     original_lines = original.split("\n")
+    n_original = len(original_lines)
     result_lines = []
     original_idx = 0
     
@@ -170,47 +442,42 @@ def apply_diff_to_content(original: str, diff: str) -> str:
     diff_lines = diff.replace("\\n", "\n").split("\n")
     
     in_hunk = False
-    hunk_start = 0
     
+    # Single pass, dispatching on the first character of each line
     for diff_line in diff_lines:
-        if diff_line.startswith("@@"):
+        c = diff_line[:1]
+        if c == "@" and diff_line.startswith("@@"):
             # Parse hunk header like @@ -5,7 +5,7 @@
-            import re
-            match = re.search(r'-(\d+)', diff_line)
+            match = _HUNK_START_RE.search(diff_line)
             if match:
                 hunk_start = int(match.group(1)) - 1  # 0-indexed
                 # Copy any lines before this hunk
-                while original_idx < hunk_start:
-                    result_lines.append(original_lines[original_idx])
-                    original_idx += 1
+                if original_idx < hunk_start:
+                    result_lines.extend(original_lines[original_idx:hunk_start])
+                    original_idx = hunk_start
             in_hunk = True
+        elif not in_hunk:
             continue
-        
-        if not in_hunk:
-            continue
-            
-        if diff_line.startswith("---") or diff_line.startswith("+++"):
-            continue
-        elif diff_line.startswith("-"):
-            # Removed line - skip in original
-            original_idx += 1
-        elif diff_line.startswith("+"):
-            # Added line
-            result_lines.append(diff_line[1:])
-        elif diff_line.startswith(" "):
+        elif c == "-":
+            if not diff_line.startswith("---"):
+                # Removed line - skip in original
+                original_idx += 1
+        elif c == "+":
+            if not diff_line.startswith("+++"):
+                # Added line
+                result_lines.append(diff_line[1:])
+        elif c == " ":
             # Context line
             result_lines.append(diff_line[1:])
             original_idx += 1
-        elif diff_line.strip() == "":
+        elif not diff_line.strip():
             # Empty line - could be context
-            if original_idx < len(original_lines):
+            if original_idx < n_original:
                 result_lines.append(original_lines[original_idx])
                 original_idx += 1
     
     # Add remaining lines from original
-    while original_idx < len(original_lines):
-        result_lines.append(original_lines[original_idx])
-        original_idx += 1
+    result_lines.extend(original_lines[original_idx:])
     
     return "\n".join(result_lines) if result_lines else None
 
@@ -2,12 +2,19 @@
 
 Every proposal → gate → execution creates one ledger entry.
 This is the ONLY way to learn: read past ledger events.
+
+Events are buffered in memory and appended in batches (one ``writev``
+per flush); the buffer is flushed every ``RFSN_LEDGER_FLUSH_EVERY``
+events, at the end of each episode, before any read, and at exit.
 """
 
 from __future__ import annotations
 
+import atexit
 import json
 import os
+import threading
+import time
 from pathlib import Path
 
 from agent.types import AgentState, LedgerEvent
@@ -21,11 +28,99 @@ except ImportError:
     logger = logging.getLogger(__name__)
 
 
+# Buffered events per log file before a forced flush
+FLUSH_EVERY = max(1, int(os.environ.get("RFSN_LEDGER_FLUSH_EVERY", "32")))
+
+# writev() accepts at most IOV_MAX buffers per call
+_IOV_MAX = os.sysconf("SC_IOV_MAX") if hasattr(os, "sysconf") else 1024
+
+
+class EventBuffer:
+    """Pending ledger lines per log file, written out in batches."""
+    
+    def __init__(self, flush_every: int = FLUSH_EVERY):
+        self.flush_every = flush_every
+        self._pending: dict[Path, list[bytes]] = {}
+        self._lock = threading.Lock()
+    
+    def add(self, path: Path, line: bytes) -> None:
+        """Queue one encoded line; flushes the file once it has enough."""
+        with self._lock:
+            lines = self._pending.setdefault(path, [])
+            lines.append(line)
+            if len(lines) >= self.flush_every:
+                self._write(path, self._pending.pop(path))
+    
+    def flush(self, path: Path | None = None) -> None:
+        """Write pending lines for ``path``, or for every file."""
+        with self._lock:
+            if path is None:
+                pending, self._pending = self._pending, {}
+            else:
+                lines = self._pending.pop(path, None)
+                pending = {path: lines} if lines else {}
+            for log_path, lines in pending.items():
+                self._write(log_path, lines)
+    
+    @staticmethod
+    def _write(path: Path, lines: list[bytes]) -> None:
+        try:
+            fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                if not hasattr(os, "writev"):
+                    _write_all(fd, b"".join(lines))
+                    return
+                for i in range(0, len(lines), _IOV_MAX):
+                    chunk = lines[i:i + _IOV_MAX]
+                    written = os.writev(fd, chunk)
+                    total = sum(len(line) for line in chunk)
+                    if written < total:
+                        # Short write: finish the rest of this chunk
+                        _write_all(fd, b"".join(chunk)[written:])
+            finally:
+                os.close(fd)
+        except Exception as e:
+            logger.error("Failed to write events", error=str(e), path=str(path), events=len(lines))
+
+
+def _write_all(fd: int, data: bytes) -> None:
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view):]
+
+
+_buffer = EventBuffer()
+atexit.register(_buffer.flush)
+
+
+def _log_path(state: AgentState) -> Path:
+    run_dir = state.notes.get("run_dir")
+    if not run_dir:
+        # Default: workdir/runs/<task_id>
+        run_dir = os.path.join(state.repo.workdir, "runs", state.task_id)
+        os.makedirs(run_dir, exist_ok=True)
+        state.notes["run_dir"] = run_dir
+    return Path(run_dir) / "events.jsonl"
+
+
+def flush_events(state: AgentState | None = None) -> None:
+    """Write buffered events for ``state``'s log, or for all logs.
+    
+    Args:
+        state: Agent state whose ledger to flush; ``None`` flushes all
+    """
+    if state is None:
+        _buffer.flush()
+    elif state.notes.get("run_dir"):
+        _buffer.flush(Path(state.notes["run_dir"]) / "events.jsonl")
+
+
 def append_event(state: AgentState, event: LedgerEvent | dict) -> None:
     """Append a ledger event to the log file.
     
     Events are written as JSONL (one JSON object per line).
-    This is append-only - never modify past events.
+    This is append-only - never modify past events. Lines are buffered;
+    call :func:`flush_events` to force them to disk.
     
     Args:
         state: Current agent state
@@ -37,36 +132,27 @@ def append_event(state: AgentState, event: LedgerEvent | dict) -> None:
         >>> # Or with dict:
         >>> append_event(state, {"event": "task_start", "task_id": "..."})
     """
-    run_dir = state.notes.get("run_dir")
-    if not run_dir:
-        # Default: workdir/runs/<task_id>
-        run_dir = os.path.join(state.repo.workdir, "runs", state.task_id)
-        os.makedirs(run_dir, exist_ok=True)
-        state.notes["run_dir"] = run_dir
-    
-    log_path = Path(run_dir) / "events.jsonl"
-    
     try:
-        with open(log_path, "a", encoding="utf-8") as f:
-            # Handle both LedgerEvent and plain dict
-            if isinstance(event, dict):
-                # Simple dict event - just add timestamp
-                import time
-                event_dict = {"ts_unix": time.time(), **event}
-            else:
-                # Convert LedgerEvent dataclass to dict
-                event_dict = {
-                    "ts_unix": event.ts_unix,
-                    "task_id": event.task_id,
-                    "repo_id": event.repo_id,
-                    "phase": event.phase.value if hasattr(event.phase, 'value') else str(event.phase),
-                    "proposal_hash": event.proposal_hash,
-                    "proposal": event.proposal,
-                    "gate": event.gate,
-                    "exec": event.exec,
-                    "result": event.result,
-                }
-            f.write(json.dumps(event_dict, ensure_ascii=False) + "\n")
+        log_path = _log_path(state)
+        
+        # Handle both LedgerEvent and plain dict
+        if isinstance(event, dict):
+            # Simple dict event - just add timestamp
+            event_dict = {"ts_unix": time.time(), **event}
+        else:
+            # Convert LedgerEvent dataclass to dict
+            event_dict = {
+                "ts_unix": event.ts_unix,
+                "task_id": event.task_id,
+                "repo_id": event.repo_id,
+                "phase": event.phase.value if hasattr(event.phase, 'value') else str(event.phase),
+                "proposal_hash": event.proposal_hash,
+                "proposal": event.proposal,
+                "gate": event.gate,
+                "exec": event.exec,
+                "result": event.result,
+            }
+        _buffer.add(log_path, (json.dumps(event_dict, ensure_ascii=False) + "\n").encode("utf-8"))
         
         task_id = event.get("task_id") if isinstance(event, dict) else event.task_id
         logger.debug("Logged event", task_id=task_id)
@@ -92,6 +178,10 @@ def read_ledger(run_dir: str) -> list[LedgerEvent]:
     """
     log_path = Path(run_dir) / "events.jsonl"
     
+    # Readers must see events still sitting in the buffer (flush every
+    # file: run_dir may be spelled differently from the writer's)
+    _buffer.flush()
+    
     if not log_path.exists():
         logger.warning("Ledger file not found", path=str(log_path))
         return []
@@ -9,7 +9,7 @@ from __future__ import annotations
 from dataclasses import dataclass, field
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class BudgetConfig:
     """Budget configuration for resource limits."""
     
@@ -21,7 +21,7 @@ class BudgetConfig:
     warning_threshold: float = 0.8
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class ContractsConfig:
     """Contracts configuration for runtime safety checks."""
     
@@ -32,7 +32,7 @@ class ContractsConfig:
     event_logging_enabled: bool = True
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class EventConfig:
     """Event system configuration."""
     
@@ -42,7 +42,7 @@ class EventConfig:
     persist_events: bool = True
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class ControllerConfig:
     """Configuration for a controller run."""
 
@@ -8,6 +8,7 @@ from __future__ import annotations
 
 import re
 from dataclasses import dataclass
+from functools import lru_cache
 
 
 @dataclass
@@ -166,13 +167,12 @@ class EarlyStopOptimizer:
         }
 
 
-# Global optimizer instance
-_global_optimizer: EarlyStopOptimizer | None = None
-
-
+@lru_cache(maxsize=1)
 def get_early_stop_optimizer() -> EarlyStopOptimizer:
     """Get global early stop optimizer."""
-    global _global_optimizer
-    if _global_optimizer is None:
-        _global_optimizer = EarlyStopOptimizer()
-    return _global_optimizer
+    return EarlyStopOptimizer()
+
+
+def reset_early_stop_optimizer() -> None:
+    """Drop the global early stop optimizer (for testing)."""
+    get_early_stop_optimizer.cache_clear()
@@ -6,51 +6,76 @@ summaries explaining WHAT changed and WHY.
 
 from __future__ import annotations
 
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+from itertools import chain
 from typing import Any
 
+_STATUS_ICONS = {"DONE": "✅", "FAILED": "❌"}
+_DEFAULT_ICON = "⏳"
+
+
+@dataclass(slots=True)
+class StepRecord:
+    """A plan step as rendered by the Explainer."""
+
+    title: str = "Unknown Step"
+    intent: str = ""
+    status: str = "PENDING"
+    result: dict[str, Any] | None = field(default_factory=dict)
+    hypothesis: str | None = None
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> StepRecord:
+        return cls(
+            title=data.get("title", "Unknown Step"),
+            intent=data.get("intent", ""),
+            status=data.get("status", "PENDING"),
+            result=data.get("result", {}),
+            hypothesis=data.get("hypothesis"),
+        )
+
 
 class Explainer:
     """Generates explanations for plan execution."""
     
-    def explain_plan(self, plan_summary: dict[str, Any], steps: list[dict[str, Any]]) -> str:
-        """Generate a full markdown explanation of the plan."""
-        lines = [
+    def explain_plan(
+        self, plan_summary: dict[str, Any], steps: list[StepRecord | dict[str, Any]]
+    ) -> str:
+        """Generate a full markdown explanation of the plan.
+
+        Steps may be StepRecord instances or legacy step dicts.
+        """
+        header = (
             f"# Execution Report: {plan_summary.get('goal', 'Unknown Goal')}",
             "",
             f"**Status**: {'Complete' if plan_summary.get('is_complete') else 'Incomplete'}",
             f"**Steps**: {plan_summary.get('total_steps', 0)}",
             "",
             "## Decision Log",
-            ""
-        ]
-        
-        for step in steps:
-            lines.append(self._explain_step(step))
-            
-        return "\n".join(lines)
-        
-    def _explain_step(self, step: dict[str, Any]) -> str:
-        """Explain a single step."""
-        title = step.get("title", "Unknown Step")
-        intent = step.get("intent", "")
-        status = step.get("status", "PENDING")
-        outcome = step.get("result", {})
+            "",
+        )
+        records = (
+            step if isinstance(step, StepRecord) else StepRecord.from_dict(step)
+            for step in steps
+        )
+        return "\n".join(chain(header, chain.from_iterable(map(self._iter_step, records))))
         
-        icon = "✅" if status == "DONE" else "❌" if status == "FAILED" else "⏳"
+    def _iter_step(self, step: StepRecord) -> Iterator[str]:
+        """Yield the markdown lines explaining a single step."""
+        icon = _STATUS_ICONS.get(step.status, _DEFAULT_ICON)
         
-        md = [
-            f"### {icon} {title}",
-            "",
-            f"**Intent**: {intent}",
-            f"**Status**: {status}",
-        ]
+        yield f"### {icon} {step.title}"
+        yield ""
+        yield f"**Intent**: {step.intent}"
+        yield f"**Status**: {step.status}"
         
+        outcome = step.result
         if outcome and not outcome.get("success", False):
             err = outcome.get("error_message", "Unknown error")
-            md.append(f"**Failure**: {err}")
+            yield f"**Failure**: {err}"
             
-        if step.get("hypothesis"):
-            md.append(f"**Hypothesis**: {step['hypothesis']}")
+        if step.hypothesis:
+            yield f"**Hypothesis**: {step.hypothesis}"
             
-        md.append("")
-        return "\n".join(md)
+        yield ""
@@ -12,6 +12,7 @@ from __future__ import annotations
 import time
 from collections import OrderedDict
 from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
 
 
@@ -172,16 +173,15 @@ class FileCache:
         }
 
 
-# Global file cache instance
-_global_cache: FileCache | None = None
-
-
+@lru_cache(maxsize=1)
 def get_file_cache() -> FileCache:
     """Get global file cache instance."""
-    global _global_cache
-    if _global_cache is None:
-        _global_cache = FileCache()
-    return _global_cache
+    return FileCache()
+
+
+def reset_file_cache() -> None:
+    """Drop the global file cache instance (for testing)."""
+    get_file_cache.cache_clear()
 
 
 def cached_read_file(filepath: str | Path, max_age_seconds: float = 60.0) -> str | None:
@@ -1,30 +1,38 @@
-"""LLM Client Package."""
+"""LLM Client Package.
+
+Provider modules are imported lazily on first attribute access (PEP 562), so
+importing this package does not pull in every backend SDK and HTTP client.
+"""
 from __future__ import annotations
 
-from .async_client import generate_patches_parallel
-from .deepseek import call_model as call_deepseek
-from .ensemble import call_ensemble_sync
-from .gemini import call_model as call_gemini
-
-# v0.2.0: Async LLM Pool for parallel operations
-try:
-    from .async_pool import AsyncLLMPool, LLMRequest, LLMResponse, call_llm_batch
-
-    __all__ = [
-        "call_deepseek",
-        "call_gemini",
-        "call_ensemble_sync",
-        "generate_patches_parallel",
-        "AsyncLLMPool",
-        "LLMRequest",
-        "LLMResponse",
-        "call_llm_batch",
-    ]
-except ImportError:
-    # async_pool requires httpx[http2]
-    __all__ = [
-        "call_deepseek",
-        "call_gemini",
-        "call_ensemble_sync",
-        "generate_patches_parallel",
-    ]
+import importlib
+from typing import Any
+
+# Public name -> (submodule, attribute)
+_LAZY_EXPORTS: dict[str, tuple[str, str]] = {
+    "call_deepseek": (".deepseek", "call_model"),
+    "call_gemini": (".gemini", "call_model"),
+    "call_ensemble_sync": (".ensemble", "call_ensemble_sync"),
+    "generate_patches_parallel": (".async_client", "generate_patches_parallel"),
+    # v0.2.0: Async LLM Pool for parallel operations
+    "AsyncLLMPool": (".async_pool", "AsyncLLMPool"),
+    "LLMRequest": (".async_pool", "LLMRequest"),
+    "LLMResponse": (".async_pool", "LLMResponse"),
+    "call_llm_batch": (".async_pool", "call_llm_batch"),
+}
+
+__all__ = list(_LAZY_EXPORTS)
+
+
+def __getattr__(name: str) -> Any:
+    try:
+        module_name, attr = _LAZY_EXPORTS[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+    value = getattr(importlib.import_module(module_name, __name__), attr)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(__all__))
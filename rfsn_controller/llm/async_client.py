@@ -96,6 +96,18 @@ class AsyncLLMResponse:
             return {"mode": "error", "error": "Invalid JSON", "raw": self.content}
 
 
+def _is_error_content(content: str) -> bool:
+    """Whether content is the ``{"mode": "error"}`` object the callers produce.
+    
+    Plain-text answers (e.g. bare code) are not errors.
+    """
+    try:
+        data = json.loads(content)
+    except json.JSONDecodeError:
+        return False
+    return isinstance(data, dict) and data.get("mode") == "error"
+
+
 async def call_deepseek_async(
     prompt: str,
     *,
@@ -103,15 +115,20 @@ async def call_deepseek_async(
     model: str = "deepseek-chat",
     system_prompt: str | None = None,
     timeout: float = DEFAULT_TIMEOUT,
+    client: Any | None = None,
 ) -> AsyncLLMResponse:
-    """Delegate to llm_deepseek.call_model_async."""
+    """Delegate to llm_deepseek.call_model_async.
+    
+    ``client`` is an optional run-scoped client from
+    ``deepseek.async_client_session`` whose connections are reused.
+    """
     from .deepseek import call_model_async as ds_call
     
     start = time.time()
     try:
         # Note: system_prompt is currently hardcoded in llm_deepseek but we can adapt if needed
         # The prompt construction happens before this usually.
-        result = await ds_call(prompt, temperature)
+        result = await ds_call(prompt, temperature, client=client)
         content = json.dumps(result)
     except Exception as e:
         content = json.dumps({"mode": "error", "error": str(e)})
@@ -201,12 +218,18 @@ async def call_deepseek_streaming(
     temperature: float = 0.0,
     model: str = "deepseek-chat",
     system_prompt: str | None = None,
+    client: Any | None = None,
 ) -> AsyncIterator[str]:
     """Delegate to llm_deepseek.call_model_streaming."""
     from .deepseek import call_model_streaming as ds_stream
     
-    async for chunk in ds_stream(prompt, temperature):
-        yield chunk
+    stream = ds_stream(prompt, temperature, client=client)
+    try:
+        async for chunk in stream:
+            yield chunk
+    finally:
+        # Propagate early close down to the HTTP stream
+        await stream.aclose()
 
 async def call_gemini_streaming(
     prompt: str,
@@ -528,6 +551,103 @@ class LLMCache:
         }
 
 
+@dataclass
+class SemanticLLMCache:
+    """Two-tier response cache in front of ``call_deepseek_async``.
+    
+    Identical prompts hit the exact SHA-256 tier (``LLMCache``); otherwise the
+    embedding tier (``SemanticCache``) returns the response of a near-duplicate
+    prompt above ``similarity_threshold``. Both tiers persist under ``cache_dir``.
+    
+    Similarity matching only compares prompts with the same ``scope``, so
+    callers should scope by the input that must match exactly (e.g. file name
+    plus content hash); prompts that share a long instruction prefix are
+    then never confused across inputs.
+    """
+    
+    cache_dir: str
+    similarity_threshold: float = 0.95
+    
+    _exact: LLMCache = field(init=False, repr=False)
+    _semantic: Any | None = field(default=None, repr=False)
+    
+    def __post_init__(self):
+        self._exact = LLMCache(db_path=os.path.join(self.cache_dir, "llm_cache.db"))
+    
+    def _semantic_tier(self) -> Any:
+        """Open the embedding tier on first use (loading the embedder is slow)."""
+        if self._semantic is None:
+            from ..semantic_cache import SemanticCache
+            self._semantic = SemanticCache(
+                db_path=os.path.join(self.cache_dir, "semantic_cache.db"),
+                similarity_threshold=self.similarity_threshold,
+            )
+        return self._semantic
+    
+    async def call(
+        self,
+        prompt: str,
+        *,
+        scope: str = "",
+        temperature: float = 0.0,
+        model: str = "deepseek-chat",
+        client: Any | None = None,
+        validator: Any | None = None,
+    ) -> AsyncLLMResponse:
+        """Answer from cache when possible, otherwise call DeepSeek and store.
+        
+        With a ``StreamingValidator``, a cache miss streams the response and
+        aborts it as soon as the validator rejects the prefix (raising
+        ``ValueError``); aborted responses are never cached.
+        """
+        cached = self._exact.get(prompt, model, temperature)
+        if cached is not None:
+            return cached
+        
+        semantic_key = f"{model}#{scope}"
+        hit = self._semantic_tier().get(prompt, semantic_key, temperature)
+        if hit is not None:
+            return AsyncLLMResponse(
+                content=hit["content"],
+                model=model,
+                temperature=temperature,
+                cached=True,
+            )
+        
+        if validator is not None:
+            from ..streaming_validator import stream_with_early_validation
+            start = time.time()
+            content = await stream_with_early_validation(
+                call_deepseek_streaming(prompt, temperature=temperature, model=model, client=client),
+                validator,
+            )
+            response = AsyncLLMResponse(
+                content=content,
+                model=model,
+                temperature=temperature,
+                latency_ms=(time.time() - start) * 1000,
+            )
+        else:
+            response = await call_deepseek_async(
+                prompt, temperature=temperature, model=model, client=client
+            )
+        
+        # Never cache failures
+        if response.content and not _is_error_content(response.content):
+            self._exact.set(prompt, model, temperature, response.content)
+            self._semantic_tier().put(
+                prompt, semantic_key, temperature, {"content": response.content}
+            )
+        
+        return response
+    
+    def close(self) -> None:
+        """Close both cache tiers."""
+        self._exact.close()
+        if self._semantic is not None:
+            self._semantic.close()
+
+
 
 
 
@@ -5,6 +5,7 @@ import hashlib
 import json
 import os
 import sqlite3
+from contextlib import asynccontextmanager
 from pathlib import Path
 
 # Lazy import: only import openai when actually calling the model
@@ -379,19 +380,52 @@ def client():
             _client = OpenAI(api_key=key, base_url="https://api.deepseek.com")
     return _client
 
+# Keep-alive pool for async clients: fan-out calls reuse TCP+TLS connections
+# instead of paying a handshake per request
+ASYNC_POOL_LIMITS = {"max_keepalive_connections": 32, "max_connections": 64}
+
+
+def _new_async_client():
+    """Build an Async DeepSeek client with its own keep-alive connection pool."""
+    _, AsyncOpenAI = _ensure_openai_imported()
+    key = os.environ.get("DEEPSEEK_API_KEY")
+    if not key:
+        return AsyncMockClient()
+    
+    kwargs = {}
+    try:
+        import httpx
+        from openai import DefaultAsyncHttpxClient
+        kwargs["http_client"] = DefaultAsyncHttpxClient(limits=httpx.Limits(**ASYNC_POOL_LIMITS))
+    except ImportError:
+        pass  # Older SDK: fall back to its default pool
+    return AsyncOpenAI(api_key=key, base_url="https://api.deepseek.com", **kwargs)
+
+
 def async_client():
     """Return a singleton Async DeepSeek client."""
     global _async_client
     if _async_client is None:
-        _, AsyncOpenAI = _ensure_openai_imported()
-        key = os.environ.get("DEEPSEEK_API_KEY")
-        if not key:
-            _async_client = AsyncMockClient()
-        else:
-            _async_client = AsyncOpenAI(api_key=key, base_url="https://api.deepseek.com")
+        _async_client = _new_async_client()
     return _async_client
 
 
+@asynccontextmanager
+async def async_client_session():
+    """Yield a run-scoped Async DeepSeek client, closing its pool on exit.
+    
+    Pass it as ``client=`` to the async call helpers so every request in a
+    run shares one set of keep-alive connections.
+    """
+    session = _new_async_client()
+    try:
+        yield session
+    finally:
+        close = getattr(session, "close", None)
+        if close is not None:
+            await close()
+
+
 def call_model(model_input: str, temperature: float = 0.0) -> dict:
     """Call the DeepSeek model with structured JSON output enforcement.
 
@@ -599,8 +633,11 @@ def call_model_with_fallback(model_input: str, temperature: float = 0.0) -> dict
     # All models failed
     raise RuntimeError(f"All LLM models failed: {'; '.join(errors)}")
 
-async def call_model_async(model_input: str, temperature: float = 0.0) -> dict:
-    """Async version of call_model."""
+async def call_model_async(model_input: str, temperature: float = 0.0, client=None) -> dict:
+    """Async version of call_model.
+    
+    ``client`` overrides the module singleton (see ``async_client_session``).
+    """
     import asyncio
     import time
     
@@ -613,7 +650,7 @@ async def call_model_async(model_input: str, temperature: float = 0.0) -> dict:
     for attempt in range(max_retries + 1):
         start_time = time.time()
         try:
-            resp = await async_client().chat.completions.create(
+            resp = await (client or async_client()).chat.completions.create(
                 model=MODEL,
                 messages=[
                     {"role": "system", "content": SYSTEM},
@@ -704,16 +741,19 @@ async def call_model_async(model_input: str, temperature: float = 0.0) -> dict:
     raise last_exception if last_exception else RuntimeError("Unknown error")
 
 
-async def call_model_streaming(model_input: str, temperature: float = 0.0):
+async def call_model_streaming(model_input: str, temperature: float = 0.0, client=None):
     """Call the DeepSeek model with streaming response.
     
+    Closing the generator early closes the HTTP stream, which stops the
+    server-side generation.
+    
     Yields:
         Chunks of the response content as they arrive.
     """
     _ensure_openai_imported()
 
     try:
-        stream = await async_client().chat.completions.create(
+        stream = await (client or async_client()).chat.completions.create(
             model=MODEL,
             messages=[
                 {"role": "system", "content": SYSTEM},
@@ -724,10 +764,15 @@ async def call_model_streaming(model_input: str, temperature: float = 0.0):
             response_format={"type": "json_object"},
         )
 
-        async for chunk in stream:
-            content = chunk.choices[0].delta.content or ""
-            if content:
-                yield content
+        try:
+            async for chunk in stream:
+                content = chunk.choices[0].delta.content or ""
+                if content:
+                    yield content
+        finally:
+            close = getattr(stream, "close", None)
+            if close is not None:
+                await close()
                 
     except Exception as e:
         raise e
@@ -19,21 +19,19 @@ Usage:
 
 from __future__ import annotations
 
+import importlib.util
+from collections.abc import Callable
 from dataclasses import dataclass
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
-try:
-    from .planner_v5 import ActionType, MetaPlanner, Proposal, StateTracker
-    HAS_PLANNER_V5 = True
-except ImportError:
-    HAS_PLANNER_V5 = False
-    MetaPlanner = None  # type: ignore
-    StateTracker = None  # type: ignore
-    Proposal = None  # type: ignore
-    ActionType = None  # type: ignore
+if TYPE_CHECKING:
+    from .planner_v5 import MetaPlanner, Proposal, StateTracker
 
+# Probe for the package without importing it; the import happens on first use.
+HAS_PLANNER_V5 = importlib.util.find_spec(f"{__package__}.planner_v5") is not None
 
-@dataclass
+
+@dataclass(slots=True)
 class ControllerAction:
     """Action translated from Planner v5 proposal for controller."""
     
@@ -45,6 +43,32 @@ class ControllerAction:
     metadata: dict[str, Any] | None = None
 
 
+# action_type -> factory(proposal, target_path, metadata) for known actions
+_ACTION_FACTORIES: dict[str, Callable[[Proposal, str | None, dict[str, Any]], ControllerAction]] = {
+    "edit_file": lambda p, target, meta: ControllerAction(
+        action_type="edit_file",
+        target_path=target,
+        content=p.change_summary,  # Simplified
+        metadata=meta,
+    ),
+    "run_tests": lambda p, target, meta: ControllerAction(
+        action_type="run_tests",
+        test_path=target,
+        metadata=meta,
+    ),
+    "read_file": lambda p, target, meta: ControllerAction(
+        action_type="read_file",
+        target_path=target,
+        metadata=meta,
+    ),
+    "run_command": lambda p, target, meta: ControllerAction(
+        action_type="run_command",
+        command=p.change_summary,  # Command stored here
+        metadata=meta,
+    ),
+}
+
+
 class PlannerV5Adapter:
     """Adapter to integrate Planner v5 with RFSN Controller.
     
@@ -52,8 +76,8 @@ class PlannerV5Adapter:
     interface and Planner v5's proposal-based interface.
     
     Attributes:
-        meta_planner: Planner v5 MetaPlanner instance
-        state_tracker: StateTracker for maintaining state
+        meta_planner: Planner v5 MetaPlanner instance (built on first access)
+        state_tracker: StateTracker for maintaining state (built on first access)
         enabled: Whether Planner v5 is available and enabled
     
     Example:
@@ -71,16 +95,37 @@ class PlannerV5Adapter:
             enabled: Whether to enable Planner v5 (default: True)
         """
         self.enabled = enabled and HAS_PLANNER_V5
-        
-        if self.enabled:
-            self.state_tracker = StateTracker()
-            self.meta_planner = MetaPlanner(state_tracker=self.state_tracker)
-        else:
-            self.state_tracker = None
-            self.meta_planner = None
+        self._initialized = False
+        self._state_tracker: StateTracker | None = None
+        self._meta_planner: MetaPlanner | None = None
+        self._summary_cache: dict | None = None
+        self._summary_iter = -1
         
         self.last_proposal: Proposal | None = None
     
+    def _ensure(self) -> None:
+        """Import Planner v5 and build its state on first use."""
+        if self._initialized or not self.enabled:
+            return
+        self._initialized = True
+        try:
+            from .planner_v5 import MetaPlanner, StateTracker
+        except ImportError:
+            self.enabled = False
+            return
+        self._state_tracker = StateTracker()
+        self._meta_planner = MetaPlanner(state_tracker=self._state_tracker)
+    
+    @property
+    def state_tracker(self) -> StateTracker | None:
+        self._ensure()
+        return self._state_tracker
+    
+    @property
+    def meta_planner(self) -> MetaPlanner | None:
+        self._ensure()
+        return self._meta_planner
+    
     def get_next_action(
         self,
         controller_feedback: dict | None = None,
@@ -138,43 +183,16 @@ class PlannerV5Adapter:
             "risk_level": proposal.risk_level,
         }
         
-        # Translate to controller action using string comparison
-        if action_type_str == "edit_file":
-            return ControllerAction(
-                action_type="edit_file",
-                target_path=target_path,
-                content=proposal.change_summary,  # Simplified
-                metadata=metadata
-            )
-        
-        elif action_type_str == "run_tests":
-            return ControllerAction(
-                action_type="run_tests",
-                test_path=target_path,
-                metadata=metadata
-            )
-        
-        elif action_type_str == "read_file":
-            return ControllerAction(
-                action_type="read_file",
-                target_path=target_path,
-                metadata=metadata
-            )
-        
-        elif action_type_str == "run_command":
-            return ControllerAction(
-                action_type="run_command",
-                command=proposal.change_summary,  # Command stored here
-                metadata=metadata
-            )
-        
-        else:
-            # Generic action - use string value
-            return ControllerAction(
-                action_type=action_type_str,
-                target_path=target_path,
-                metadata=metadata
-            )
+        # Translate to controller action via the dispatch table
+        factory = _ACTION_FACTORIES.get(action_type_str)
+        if factory is not None:
+            return factory(proposal, target_path, metadata)
+        # Generic action - use string value
+        return ControllerAction(
+            action_type=action_type_str,
+            target_path=target_path,
+            metadata=metadata
+        )
     
     def process_result(self, result: dict) -> None:
         """Process execution result and update planner state.
@@ -213,19 +231,29 @@ class PlannerV5Adapter:
     def get_state_summary(self) -> dict:
         """Get summary of planner state.
         
+        The planner only mutates its state inside next_proposal(), which
+        bumps current_iteration first, so the snapshot is cached per
+        iteration. Callers must treat the returned dict as read-only.
+        
         Returns:
             Dictionary with state summary
         """
         if not self.enabled or not self.state_tracker:
             return {"enabled": False}
         
-        return {
+        tracker = self.state_tracker
+        if self._summary_cache is not None and self._summary_iter == tracker.current_iteration:
+            return self._summary_cache
+        
+        self._summary_cache = {
             "enabled": True,
-            "failing_tests": len(self.state_tracker.failing_tests),
-            "suspect_files": len(self.state_tracker.suspect_files),
-            "iterations": self.state_tracker.iteration,
-            "risk_used": self.state_tracker.risk_used,
+            "failing_tests": len(tracker.failing_tests),
+            "suspect_files": len(tracker.suspect_files),
+            "iterations": tracker.current_iteration,
+            "risk_used": tracker.risk_spent,
         }
+        self._summary_iter = tracker.current_iteration
+        return self._summary_cache
 
 
 def create_planner_adapter(use_v5: bool = True) -> PlannerV5Adapter:
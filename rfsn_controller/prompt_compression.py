@@ -113,6 +113,34 @@ def compress_prompt(
     return compressed, stats
 
 
+def summarize_traceback(block: str, context_lines: int = 3) -> str:
+    """Condense one pytest failure block to what a fix needs.
+    
+    Keeps the block's first line (the test name), the ``context_lines``
+    traceback lines leading up to the first ``E`` line, and the ``E``
+    lines themselves. Blocks without ``E`` lines keep their last
+    ``context_lines`` lines.
+    
+    Args:
+        block: Text of one failure block, header line first.
+        context_lines: Traceback lines to keep before the error.
+        
+    Returns:
+        Condensed block.
+    """
+    lines = block.strip('\n').split('\n')
+    header, body = lines[0], lines[1:]
+    
+    first_error = next((i for i, line in enumerate(body) if line.startswith('E ')), None)
+    if first_error is None:
+        kept = body[-context_lines:] if context_lines else []
+    else:
+        kept = body[max(0, first_error - context_lines):first_error]
+        kept += [line for line in body[first_error:] if line.startswith('E ')]
+    
+    return '\n'.join([header, *kept])
+
+
 def compress_file_content(content: str, filename: str) -> str:
     """Compress file content based on file type.
     
@@ -253,6 +253,13 @@ class SemanticCache:
             except Exception:
                 pass
     
+    def close(self) -> None:
+        """Close database connection."""
+        with self._lock:
+            if self._conn:
+                self._conn.close()
+                self._conn = None
+    
     def _prune(self) -> None:
         """Remove old entries if over limit."""
         if not self._conn:
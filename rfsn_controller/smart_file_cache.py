@@ -15,6 +15,7 @@ import os
 import threading
 import time
 from dataclasses import dataclass, field
+from functools import lru_cache
 from typing import Any
 
 # ============================================================================
@@ -203,16 +204,15 @@ class SmartFileCache:
             }
 
 
-# Global file cache
-_file_cache: SmartFileCache | None = None
-
-
+@lru_cache(maxsize=1)
 def get_file_cache() -> SmartFileCache:
     """Get the global file cache."""
-    global _file_cache
-    if _file_cache is None:
-        _file_cache = SmartFileCache()
-    return _file_cache
+    return SmartFileCache()
+
+
+def reset_file_cache() -> None:
+    """Drop the global file cache (for testing)."""
+    get_file_cache.cache_clear()
 
 
 # ============================================================================
@@ -437,9 +437,7 @@ def read_files_from_diff(
 
 def clear_all_caches() -> None:
     """Clear all file caches."""
-    global _file_cache
-    if _file_cache:
-        _file_cache.clear()
+    get_file_cache().clear()
 
 
 def get_cache_stats() -> dict[str, Any]:
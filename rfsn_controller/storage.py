@@ -20,13 +20,44 @@ import os
 import shutil
 from dataclasses import dataclass
 
+# Concurrent S3 requests and the size above which files use multipart upload
+S3_MAX_CONCURRENCY = 16
+S3_MULTIPART_THRESHOLD = 8 * 1024 * 1024
+
+
+def _smart_copy(src: str, dst: str) -> str:
+    """Copy a file like shutil.copy2, using copy_file_range on one filesystem.
+
+    When source and destination share a device, os.copy_file_range lets the
+    kernel copy (or reflink, on CoW filesystems) without moving the data
+    through user space. Any failure falls back to shutil.copy2.
+    """
+    if hasattr(os, "copy_file_range"):
+        try:
+            with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+                src_stat = os.fstat(fsrc.fileno())
+                if src_stat.st_dev == os.fstat(fdst.fileno()).st_dev:
+                    remaining = src_stat.st_size
+                    while remaining > 0:
+                        copied = os.copy_file_range(fsrc.fileno(), fdst.fileno(), remaining)
+                        if copied == 0:
+                            break
+                        remaining -= copied
+                    if remaining == 0:
+                        fdst.close()
+                        shutil.copystat(src, dst)
+                        return dst
+        except OSError:
+            pass
+    return shutil.copy2(src, dst)
+
 
 class StorageError(RuntimeError):
     """Exception raised for storage-related errors."""
     pass
 
 
-@dataclass
+@dataclass(slots=True)
 class PublishResult:
     """Result of a storage publish operation.
     
@@ -77,15 +108,7 @@ class LocalStore(BaseStore):
         Returns:
             PublishResult with absolute destination path
         """
-        os.makedirs(dest, exist_ok=True)
-        for root, dirs, files in os.walk(src_dir):
-            rel_root = os.path.relpath(root, src_dir)
-            out_root = os.path.join(dest, rel_root) if rel_root != "." else dest
-            os.makedirs(out_root, exist_ok=True)
-            for d in dirs:
-                os.makedirs(os.path.join(out_root, d), exist_ok=True)
-            for f in files:
-                shutil.copy2(os.path.join(root, f), os.path.join(out_root, f))
+        shutil.copytree(src_dir, dest, dirs_exist_ok=True, copy_function=_smart_copy)
         return PublishResult(backend="local", destination=os.path.abspath(dest))
 
 
@@ -109,6 +132,34 @@ class S3Store(BaseStore):
         """
         self.bucket = bucket
         self.prefix = prefix.strip("/")
+        self._client = None
+        self._transfer = None
+
+    @property
+    def client(self):
+        """The boto3 S3 client, created on first use and reused across publishes."""
+        if self._client is None:
+            try:
+                import boto3  # type: ignore
+            except Exception as e:
+                raise StorageError("boto3 is required for S3 publishing. pip install boto3") from e
+            self._client = boto3.client("s3")
+        return self._client
+
+    def _get_transfer(self):
+        """Return the shared TransferManager built on top of ``client``."""
+        if self._transfer is None:
+            client = self.client
+            try:
+                from s3transfer.manager import TransferConfig, TransferManager  # type: ignore
+            except Exception as e:
+                raise StorageError("boto3 is required for S3 publishing. pip install boto3") from e
+            config = TransferConfig(
+                max_request_concurrency=S3_MAX_CONCURRENCY,
+                multipart_threshold=S3_MULTIPART_THRESHOLD,
+            )
+            self._transfer = TransferManager(client, config)
+        return self._transfer
 
     def put_dir(self, src_dir: str, dest: str) -> PublishResult:
         """Upload directory to S3.
@@ -123,19 +174,26 @@ class S3Store(BaseStore):
         Raises:
             StorageError: If boto3 not installed or upload fails
         """
-        try:
-            import boto3  # type: ignore
-        except Exception as e:
-            raise StorageError("boto3 is required for S3 publishing. pip install boto3") from e
-
-        s3 = boto3.client("s3")
+        transfer = self._get_transfer()
         base = f"{self.prefix}/{dest}".strip("/")
-        for root, _, files in os.walk(src_dir):
-            rel_root = os.path.relpath(root, src_dir)
+        uploads = []
+        # os.walk yields roots prefixed by its (absolute) top, so the relative
+        # part is a plain slice rather than a relpath() per directory.
+        src_root = os.path.abspath(src_dir)
+        prefix_len = len(os.path.join(src_root, ""))
+        for root, _, files in os.walk(src_root):
+            rel_root = root[prefix_len:]
+            # Normalise the key prefix once per directory, not once per file
+            key_root = f"{base}/{rel_root.replace(os.sep, '/')}" if rel_root else base
+            root_sep = root + os.sep
             for f in files:
-                local_path = os.path.join(root, f)
-                key = f"{base}/{rel_root}/{f}".replace("\\", "/").replace("/./", "/")
-                s3.upload_file(local_path, self.bucket, key)
+                key = f"{key_root}/{f}"
+                uploads.append((key, transfer.upload(root_sep + f, self.bucket, key)))
+        for key, future in uploads:
+            try:
+                future.result()
+            except Exception as e:
+                raise StorageError(f"S3 upload failed for {key}: {e}") from e
         return PublishResult(backend="s3", destination=f"s3://{self.bucket}/{base}")
 
 
@@ -45,9 +45,20 @@ class StreamingValidator:
     # Maximum bytes to accumulate before forcing accept
     max_bytes: int = 50000
     
+    # Optional pattern the response must open with, checked once
+    # ``prefix_bytes`` non-whitespace chars have arrived
+    prefix_pattern: str | None = None
+    prefix_bytes: int = 64
+    
+    # JSON responses that still lack this key after ``json_key_window``
+    # bytes are rejected
+    json_key: str = '"mode"'
+    json_key_window: int = 500
+    
     def __post_init__(self):
         self._valid_compiled = [re.compile(p, re.IGNORECASE) for p in self.valid_patterns]
         self._invalid_compiled = [re.compile(p, re.IGNORECASE) for p in self.invalid_patterns]
+        self._prefix_compiled = re.compile(self.prefix_pattern) if self.prefix_pattern else None
     
     def validate_partial(self, content: str) -> bool | None:
         """Check if partial content is valid, invalid, or undetermined.
@@ -58,6 +69,11 @@ class StreamingValidator:
         Returns:
             True if valid, False if invalid, None if undetermined.
         """
+        if self._prefix_compiled is not None:
+            head = content.lstrip()
+            if len(head) >= self.prefix_bytes and not self._prefix_compiled.match(head):
+                return False
+        
         if len(content) < self.min_bytes:
             return None
         
@@ -72,9 +88,9 @@ class StreamingValidator:
                 return True
         
         # If we have lots of content and no patterns, probably invalid
-        if len(content) > 500:
+        if len(content) > self.json_key_window:
             # Check for JSON structure at least
-            if '{' in content and '"mode"' not in content:
+            if '{' in content and self.json_key not in content:
                 return False
         
         return None  # Undetermined
@@ -104,23 +120,30 @@ async def stream_with_early_validation(
     accumulated = ""
     validated = False
     
-    async for chunk in stream:
-        accumulated += chunk
-        
-        if not validated:
-            result = validator.validate_partial(accumulated)
-            if result is True:
-                validated = True
-                if on_valid:
-                    on_valid(accumulated)
-            elif result is False:
-                if on_invalid:
-                    on_invalid(accumulated)
-                raise ValueError(f"Invalid response detected early: {accumulated[:200]}...")
-        
-        # Safety limit
-        if len(accumulated) > validator.max_bytes:
-            break
+    try:
+        async for chunk in stream:
+            accumulated += chunk
+            
+            if not validated:
+                result = validator.validate_partial(accumulated)
+                if result is True:
+                    validated = True
+                    if on_valid:
+                        on_valid(accumulated)
+                elif result is False:
+                    if on_invalid:
+                        on_invalid(accumulated)
+                    raise ValueError(f"Invalid response detected early: {accumulated[:200]}...")
+            
+            # Safety limit
+            if len(accumulated) > validator.max_bytes:
+                break
+    finally:
+        # Stop the producer now rather than at garbage collection, so an
+        # aborted generation stops decoding tokens
+        aclose = getattr(stream, "aclose", None)
+        if aclose is not None:
+            await aclose()
     
     return accumulated
 
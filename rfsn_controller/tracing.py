@@ -26,38 +26,39 @@ Usage:
 from __future__ import annotations
 
 import functools
+import importlib.util
 from collections.abc import Callable
 from contextlib import contextmanager
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
-try:
-    from opentelemetry import trace
-    from opentelemetry.exporter.jaeger.thrift import JaegerExporter
-    from opentelemetry.sdk.resources import SERVICE_NAME, Resource
+if TYPE_CHECKING:
     from opentelemetry.sdk.trace import TracerProvider
-    from opentelemetry.sdk.trace.export import (
-        BatchSpanProcessor,
-        ConsoleSpanExporter,
-    )
-    from opentelemetry.trace import Span, Status, StatusCode
-    
-    HAS_OPENTELEMETRY = True
-except ImportError:
-    HAS_OPENTELEMETRY = False
-    trace = None  # type: ignore
-    TracerProvider = None  # type: ignore
-    BatchSpanProcessor = None  # type: ignore
-    JaegerExporter = None  # type: ignore
-    ConsoleSpanExporter = None  # type: ignore
-    Resource = None  # type: ignore
-    SERVICE_NAME = None  # type: ignore
-    Status = None  # type: ignore
-    StatusCode = None  # type: ignore
-    Span = None  # type: ignore
+
+
+def _has_module(name: str) -> bool:
+    """Check that a module is installed without executing it."""
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+# Probe availability from package metadata only: the SDK and exporter
+# import graphs are large, and most processes never call init_tracing()
+HAS_OPENTELEMETRY = all(
+    _has_module(name)
+    for name in ("opentelemetry.trace", "opentelemetry.sdk", "opentelemetry.exporter.jaeger")
+)
+
+@functools.cache
+def _trace_api() -> Any:
+    """The ``opentelemetry.trace`` API module, imported on first use."""
+    from opentelemetry import trace
+    return trace
 
 
 # Global tracer provider
-_tracer_provider: Any | None = None
+_tracer_provider: TracerProvider | None = None
 _tracing_enabled = False
 
 
@@ -90,6 +91,16 @@ def init_tracing(
         return False
     
     try:
+        # Imported here rather than at module load: the SDK and exporter
+        # import graphs are large, and most processes never trace
+        from opentelemetry.exporter.jaeger.thrift import JaegerExporter
+        from opentelemetry.sdk.resources import SERVICE_NAME, Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import (
+            BatchSpanProcessor,
+            ConsoleSpanExporter,
+        )
+        
         # Create resource with service name
         resource = Resource(attributes={
             SERVICE_NAME: service_name
@@ -115,7 +126,7 @@ def init_tracing(
             )
         
         # Set as global tracer provider
-        trace.set_tracer_provider(_tracer_provider)
+        _trace_api().set_tracer_provider(_tracer_provider)
         
         _tracing_enabled = True
         print(f"✓ Tracing initialized: {service_name} → {jaeger_host}:{jaeger_port}")
@@ -144,7 +155,13 @@ def get_tracer(name: str) -> Any:
     if not HAS_OPENTELEMETRY or not _tracing_enabled:
         return NoOpTracer()
     
-    return trace.get_tracer(name)
+    return _trace_api().get_tracer(name)
+
+
+def _status(code: str, description: str | None = None) -> Any:
+    """Build a span ``Status``; only called once tracing is enabled."""
+    api = _trace_api()
+    return api.Status(api.StatusCode[code], description)
 
 
 def is_tracing_enabled() -> bool:
@@ -192,7 +209,7 @@ def trace_span(
             yield span
         except Exception as e:
             if span:
-                span.set_status(Status(StatusCode.ERROR, str(e)))
+                span.set_status(_status("ERROR", str(e)))
                 span.record_exception(e)
             raise
 
@@ -237,10 +254,10 @@ def trace_function(
                 
                 try:
                     result = func(*args, **kwargs)
-                    span.set_status(Status(StatusCode.OK))
+                    span.set_status(_status("OK"))
                     return result
                 except Exception as e:
-                    span.set_status(Status(StatusCode.ERROR, str(e)))
+                    span.set_status(_status("ERROR", str(e)))
                     span.record_exception(e)
                     raise
         
@@ -299,7 +316,7 @@ def trace_llm_call(
         "llm.error": error or "",
     }) as span:
         if span and error:
-            span.set_status(Status(StatusCode.ERROR, error))
+            span.set_status(_status("ERROR", error))
 
 
 def trace_proposal(
@@ -326,7 +343,7 @@ def trace_proposal(
         "proposal.rejection_reason": rejection_reason or "",
     }) as span:
         if span and not accepted:
-            span.set_status(Status(StatusCode.ERROR, rejection_reason or "Rejected"))
+            span.set_status(_status("ERROR", rejection_reason or "Rejected"))
 
 
 def trace_test_execution(
@@ -353,7 +370,7 @@ def trace_test_execution(
         "test.errors": errors,
     }) as span:
         if span and not passed:
-            span.set_status(Status(StatusCode.ERROR, f"{failures} failures, {errors} errors"))
+            span.set_status(_status("ERROR", f"{failures} failures, {errors} errors"))
 
 
 def shutdown_tracing():
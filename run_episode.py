@@ -234,7 +234,8 @@ Environment Variables:
             }
             
             output_path = Path(args.output)
-            output_path.write_text(json.dumps(output_data, indent=2))
+            # Planner notes may hold sets/deques; serialize those as lists
+            output_path.write_text(json.dumps(output_data, indent=2, default=list))
             logger.info(f"Results saved to: {output_path}")
         
         return 0 if success else 1
@@ -0,0 +1,55 @@
+"""Precompress the web UI assets so ui/server.py can serve them as-is.
+
+Writes ``<file>.gz`` (and ``<file>.br`` when the ``brotli`` package is
+installed) next to every HTML/JS/CSS file under ``ui/``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gzip
+import os
+
+try:
+    import brotli
+    HAS_BROTLI = True
+except ImportError:
+    HAS_BROTLI = False
+
+EXTENSIONS = (".html", ".js", ".css")
+
+
+def compress_file(path: str) -> list[str]:
+    """Write compressed siblings of ``path`` and return their paths."""
+    with open(path, "rb") as f:
+        data = f.read()
+
+    written = []
+    # mtime=0 keeps the .gz output reproducible across builds
+    with open(path + ".gz", "wb") as f:
+        f.write(gzip.compress(data, compresslevel=9, mtime=0))
+    written.append(path + ".gz")
+
+    if HAS_BROTLI:
+        with open(path + ".br", "wb") as f:
+            f.write(brotli.compress(data, quality=11))
+        written.append(path + ".br")
+    return written
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--dir", default=os.path.normpath(os.path.join(os.path.dirname(__file__), "..", "ui")))
+    args = ap.parse_args()
+
+    for name in sorted(os.listdir(args.dir)):
+        if name.endswith(EXTENSIONS):
+            for out in compress_file(os.path.join(args.dir, name)):
+                print(out)
+    if not HAS_BROTLI:
+        print("brotli not installed; wrote gzip variants only")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
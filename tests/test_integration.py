@@ -116,12 +116,251 @@ class TestAgentFoundation:
         assert callable(check_files)
         assert callable(check_tests)
 
+    def test_multi_request_response_becomes_batch(self, tmp_path):
+        """Test that multiple tool requests are folded into one batch proposal."""
+        from agent.deepseek_agent import _parse_response_to_proposal
+        from agent.types import AgentState, BudgetState, Phase, RepoFingerprint
+
+        state = AgentState(
+            task_id="t",
+            repo=RepoFingerprint(repo_id="r", commit_sha="c", workdir=str(tmp_path)),
+            phase=Phase.LOCALIZE,
+            budget=BudgetState(max_rounds=5),
+        )
+        response = {
+            "mode": "tool_request",
+            "requests": [
+                {"tool": "sandbox.read_file", "args": {"path": "a.py"}},
+                {"tool": "sandbox.read_file", "args": {"path": "b.py"}},
+                {"tool": "sandbox.grep", "args": {"pattern": "foo_bar"}},
+            ],
+        }
+
+        proposal = _parse_response_to_proposal(response, state)
+
+        assert proposal.kind == "batch"
+        assert proposal.inputs["ops"] == [
+            {"kind": "inspect", "inputs": {"files": ["a.py", "b.py"]}},
+            {"kind": "search", "inputs": {"query": "foo_bar"}},
+        ]
+        assert "foo_bar" in state.notes["searched_terms"]
+
+    def test_mixed_batch_drops_ops_the_phase_disallows(self, tmp_path):
+        """Test that a disallowed request in a batch does not reject the allowed ones."""
+        from types import SimpleNamespace
+
+        from agent.deepseek_agent import _parse_response_to_proposal, gate
+        from agent.types import AgentState, BudgetState, Phase, RepoFingerprint
+
+        state = AgentState(
+            task_id="t",
+            repo=RepoFingerprint(repo_id="r", commit_sha="c", workdir=str(tmp_path)),
+            phase=Phase.LOCALIZE,
+            budget=BudgetState(max_rounds=5),
+        )
+        run_tests = {"tool": "sandbox.run_tests", "args": {"command": "pytest"}}
+        read = {"tool": "sandbox.read_file", "args": {"path": "a.py"}}
+        grep = {"tool": "sandbox.grep", "args": {"pattern": "foo_bar"}}
+
+        batch = _parse_response_to_proposal({"mode": "tool_request", "requests": [read, run_tests, grep]}, state)
+        single = _parse_response_to_proposal({"mode": "tool_request", "requests": [run_tests, read]}, state)
+
+        assert batch.kind == "batch"
+        assert [op["kind"] for op in batch.inputs["ops"]] == ["inspect", "search"]
+        assert single.kind == "inspect"
+        assert single.inputs["files"] == ["a.py"]
+        profile = SimpleNamespace(max_test_runs=5, forbid_test_modifications=True)
+        assert gate(profile, state, batch).accept
+        assert gate(profile, state, single).accept
+
+    def test_failed_patch_leaves_tree_untouched(self, tmp_path):
+        """Test that a patch which does not apply leaves no conflict markers."""
+        import subprocess
+
+        from agent.deepseek_agent import _exec_edit
+        from agent.types import AgentState, BudgetState, Phase, Proposal, RepoFingerprint
+
+        def git(*args):
+            subprocess.run(["git", *args], cwd=tmp_path, check=True, capture_output=True)
+
+        def commit(text):
+            target.write_text(text)
+            git("add", "f.py")
+            git("-c", "user.name=t", "-c", "user.email=t@t", "commit", "-qm", "c")
+
+        # A real `git diff` (with index lines) against a line that has since
+        # changed: a 3-way apply would conflict and write markers
+        target = tmp_path / "f.py"
+        git("init", "-q")
+        commit("x = 1\ny = 2\nz = 3\n")
+        target.write_text("x = 1\ny = 6\nz = 3\n")
+        stale = subprocess.run(["git", "diff"], cwd=tmp_path, capture_output=True, text=True).stdout
+        commit("x = 1\ny = 7\nz = 3\n")
+
+        state = AgentState(
+            task_id="t",
+            repo=RepoFingerprint(repo_id="r", commit_sha="c", workdir=str(tmp_path)),
+            phase=Phase.PATCH_CANDIDATES,
+            budget=BudgetState(max_rounds=5),
+        )
+        result = _exec_edit(state, Proposal(kind="edit", rationale="r", inputs={"files": ["f.py"], "diff": stale}))
+
+        assert result.status == "fail"
+        assert target.read_text() == "x = 1\ny = 7\nz = 3\n"
+        status = subprocess.run(["git", "status", "--porcelain"], cwd=tmp_path, capture_output=True, text=True)
+        assert status.stdout == ""
+
+        clean = "--- a/f.py\n+++ b/f.py\n@@ -1,3 +1,3 @@\n x = 1\n-y = 7\n+y = 8\n z = 3\n"
+        result = _exec_edit(state, Proposal(kind="edit", rationale="r", inputs={"files": ["f.py"], "diff": clean}))
+
+        assert result.status == "ok"
+        assert target.read_text() == "x = 1\ny = 8\nz = 3\n"
+
+    def test_structured_edit_rewrites_repeated_lines(self, tmp_path):
+        """Test that identical removed lines each match their own occurrence."""
+        from agent.deepseek_agent import _try_structured_edit
+        from agent.types import AgentState, BudgetState, Phase, Proposal, RepoFingerprint
+
+        target = tmp_path / "f.py"
+        target.write_text("def f():\n    total = 0\n\ndef g():\n    total = 0\n")
+        state = AgentState(
+            task_id="t",
+            repo=RepoFingerprint(repo_id="r", commit_sha="c", workdir=str(tmp_path)),
+            phase=Phase.PATCH_CANDIDATES,
+            budget=BudgetState(max_rounds=5),
+        )
+        # Unindented lines, so only the fuzzy line match can apply them
+        diff = "--- a/f.py\n+++ b/f.py\n@@ -1,2 +1,2 @@\n-total = 0\n-total = 0\n+total = 1\n+total = 2\n"
+
+        result = _try_structured_edit(state, Proposal(kind="edit", rationale="r", inputs={"files": ["f.py"]}), diff)
+
+        assert result is not None and result.status == "ok"
+        assert target.read_text() == "def f():\n    total = 1\n\ndef g():\n    total = 2\n"
+
+    def test_json_report_probed_in_target_environment(self, tmp_path, monkeypatch):
+        """Test that pytest-json-report is looked up in the interpreter being run."""
+        from agent import deepseek_agent
+        from agent.types import AgentState, BudgetState, Phase, Proposal, RepoFingerprint
+
+        with_plugin, without_plugin = tmp_path / "py-with", tmp_path / "py-without"
+        with_plugin.write_text("#!/bin/sh\nexit 0\n")
+        without_plugin.write_text("#!/bin/sh\nexit 1\n")
+        script = tmp_path / "pytest"
+        script.write_text(f"#!/usr/bin/env {with_plugin}\n")
+        for path in (with_plugin, without_plugin, script):
+            path.chmod(0o755)
+
+        state = AgentState(
+            task_id="t",
+            repo=RepoFingerprint(repo_id="r", commit_sha="c", workdir=str(tmp_path)),
+            phase=Phase.TEST_STAGE,
+            budget=BudgetState(max_rounds=5),
+        )
+        runs = []
+        monkeypatch.setattr(
+            deepseek_agent, "_stream_test_command",
+            lambda cmd_parts, workdir: runs.append(cmd_parts) or (0, [], ""),
+        )
+
+        for python, expected in ((without_plugin, False), (with_plugin, True)):
+            runs.clear()
+            command = [str(python), "-m", "pytest"]
+            deepseek_agent._exec_run_tests(state, Proposal(kind="run_tests", rationale="r", inputs={"command": command}))
+
+            # One run per call: the suite is never repeated without the plugin
+            assert len(runs) == 1
+            assert ("--json-report" in runs[0]) is expected
+
+        assert deepseek_agent._pytest_interpreter(["./pytest", "-q"], tmp_path) == str(with_plugin)
+
+    def test_cached_response_is_not_shared(self, monkeypatch):
+        """Test that mutating a cached response does not change later hits."""
+        from collections import OrderedDict
+
+        from agent import deepseek_agent
+
+        calls = []
+        monkeypatch.setattr(deepseek_agent, "_response_cache", OrderedDict())
+        monkeypatch.setattr(
+            deepseek_agent, "call_model",
+            lambda prompt, temperature: calls.append(prompt) or {"tool_requests": [{"tool": "read"}]},
+        )
+
+        first = deepseek_agent._call_model_cached("prompt", 0.0)
+        first["tool_requests"].clear()
+        second = deepseek_agent._call_model_cached("prompt", 0.0)
+        second["tool_requests"][0]["tool"] = "edit"
+
+        assert len(calls) == 1
+        assert deepseek_agent._call_model_cached("prompt", 0.0) == {"tool_requests": [{"tool": "read"}]}
+
+    def test_network_fs_mount_points_with_spaces(self, tmp_path, monkeypatch):
+        """Test that octal-escaped mount points in /proc/mounts are decoded."""
+        from agent import deepseek_agent
+
+        mounts = tmp_path / "mounts"
+        mounts.write_text(
+            "/dev/sda1 / ext4 rw 0 0\n"
+            "server:/share /srv/team\\040share nfs4 rw 0 0\n"
+        )
+        monkeypatch.setattr(deepseek_agent, "_MOUNTS_PATH", str(mounts))
+        deepseek_agent._is_network_fs.cache_clear()
+        try:
+            assert deepseek_agent._is_network_fs("/srv/team share/repo")
+            assert not deepseek_agent._is_network_fs("/srv/team/repo")
+        finally:
+            deepseek_agent._is_network_fs.cache_clear()
+
+    def test_diff_paths_with_spaces_and_timestamps(self):
+        """Test that diff header paths keep spaces and drop timestamps."""
+        from agent.deepseek_agent import _extract_files_from_diff
+
+        diff = (
+            "--- a/docs/my notes.py\t2024-01-01 10:00:00.000 +0000\n"
+            "+++ b/docs/my notes.py\t2024-01-01 10:05:00.000 +0000\n"
+            "@@ -1 +1 @@\n-a\n+b\n"
+            "--- /dev/null\n"
+            "+++ b/src/new.py\n"
+        )
+
+        assert _extract_files_from_diff(diff) == ["docs/my notes.py", "src/new.py"]
+
     def test_memory_logging(self):
         """Test memory logging module."""
         from memory.log import append_event
         
         assert callable(append_event)
 
+    def test_memory_logging_buffers_until_flush(self, tmp_path):
+        """Test that ledger events are batched and flushed in order."""
+        import json
+
+        from agent.types import AgentState, BudgetState, Phase, RepoFingerprint
+        from memory.log import FLUSH_EVERY, append_event, flush_events, read_ledger
+
+        state = AgentState(
+            task_id="t",
+            repo=RepoFingerprint(repo_id="r", commit_sha="c", workdir=str(tmp_path)),
+            phase=Phase.LOCALIZE,
+            budget=BudgetState(max_rounds=5),
+        )
+        log_path = tmp_path / "runs" / "t" / "events.jsonl"
+
+        append_event(state, {"event": "first", "task_id": "t"})
+        assert not log_path.exists() or log_path.read_text() == ""
+
+        flush_events(state)
+        assert [json.loads(line)["event"] for line in log_path.read_text().splitlines()] == ["first"]
+
+        for i in range(FLUSH_EVERY):
+            append_event(state, {"event": f"e{i}", "task_id": "t"})
+        assert len(log_path.read_text().splitlines()) == FLUSH_EVERY + 1
+
+        append_event(state, {"event": "last", "task_id": "t"})
+        events = read_ledger(state.notes["run_dir"])
+        assert [e["event"] for e in events][-1] == "last"
+        assert len(events) == FLUSH_EVERY + 2
+
 
 class TestControllerIntegration:
     """Test main controller integration."""
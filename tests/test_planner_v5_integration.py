@@ -187,6 +187,24 @@ class TestPlannerV5StateTracking:
                 # State should track hypotheses
                 assert adapter.state_tracker is not None
 
+    def test_state_summary_tracks_iterations(self, adapter):
+        """Test that the state summary is refreshed once per iteration."""
+        if not adapter.enabled:
+            pytest.skip("Planner v5 not available")
+
+        adapter.get_next_action()
+        summary = adapter.get_state_summary()
+        assert summary["enabled"] is True
+        assert summary["iterations"] == 1
+        assert adapter.get_state_summary() is summary
+
+        adapter.get_next_action(controller_feedback={"success": False, "tests_failed": 1})
+        assert adapter.get_state_summary()["iterations"] == 2
+
+    def test_state_summary_disabled(self):
+        """Test the summary of a disabled adapter."""
+        assert PlannerV5Adapter(enabled=False).get_state_summary() == {"enabled": False}
+
 
 class TestPlannerV5CLI:
     """Test CLI integration with Planner v5."""
@@ -0,0 +1,105 @@
+"""Tests for the examples/run_fix_demo.py fix loop."""
+
+import contextlib
+import importlib.util
+import json
+import subprocess
+import sys
+import types
+from pathlib import Path
+
+import pytest
+
+DEMO_PATH = Path(__file__).parent.parent / "examples" / "run_fix_demo.py"
+
+
+@pytest.fixture
+def demo():
+    spec = importlib.util.spec_from_file_location("run_fix_demo", DEMO_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class TestFixBatch:
+    """Test that batched LLM answers are applied per file."""
+
+    @pytest.mark.asyncio
+    async def test_two_file_json_response_fixes_both_files(self, demo, tmp_path, monkeypatch):
+        """Test that a JSON-mode answer for a two-file batch fixes both files."""
+        (tmp_path / "calc.py").write_text("def add(a, b):\n    return a - b\n")
+        (tmp_path / "mathx.py").write_text("def factorial(n):\n    return n * factorial(n)\n")
+        (tmp_path / "test_calc.py").write_text("")
+        fixed = {
+            "calc.py": "# Calculator helpers\n\ndef add(a, b):\n    return a + b\n",
+            "mathx.py": "# Math helpers\n\ndef factorial(n):\n    return 1 if n <= 1 else n * factorial(n - 1)\n",
+        }
+
+        class FakeResponse:
+            content = json.dumps({"files": fixed})
+
+        class FakeCache:
+            def __init__(self, path):
+                self.prompts = []
+
+            async def call(self, prompt, **kwargs):
+                return FakeResponse()
+
+            def close(self):
+                pass
+
+        @contextlib.asynccontextmanager
+        async def fake_session():
+            yield None
+
+        runs = iter([(1, "FAILED test_calc.py::test_add", ["test_calc.py::test_add"])])
+        monkeypatch.setattr(demo, "run_pytest", lambda *args: next(runs, (0, "", [])))
+        monkeypatch.setattr(demo, "SemanticLLMCache", FakeCache)
+        monkeypatch.setattr(demo, "async_client_session", fake_session)
+
+        await demo.run_fix_demo(str(tmp_path))
+
+        assert (tmp_path / "calc.py").read_text() == fixed["calc.py"]
+        assert (tmp_path / "mathx.py").read_text() == fixed["mathx.py"]
+
+    def test_split_batch_response_single_file_fallback(self, demo):
+        """Test that a one-file batch accepts a response in any format."""
+        response = '{"diff": "--- a/calc.py"}'
+
+        assert demo.split_batch_response(response, ["calc.py"]) == {"calc.py": response}
+        assert demo.split_batch_response(response, ["calc.py", "mathx.py"]) == {}
+
+
+class TestRunPytest:
+    """Test the demo's pytest runner."""
+
+    def test_reports_failures(self, demo, tmp_path):
+        """Test that failed node ids come back from the forked run."""
+        (tmp_path / "test_calc.py").write_text("def test_ok():\n    pass\n\ndef test_bad():\n    assert False\n")
+
+        code, output, failed = demo.run_pytest(tmp_path, "-p", "no:cacheprovider")
+
+        assert code == 1
+        assert failed == ["test_calc.py::test_bad"]
+        assert "test_ok PASSED" in output
+
+    def test_hanging_run_times_out(self, demo, tmp_path, monkeypatch):
+        """Test that a test stuck in a loop is killed after PYTEST_TIMEOUT."""
+        (tmp_path / "test_loop.py").write_text("def test_loop():\n    while True:\n        pass\n")
+        monkeypatch.setattr(demo, "PYTEST_TIMEOUT", 2)
+
+        with pytest.raises(subprocess.TimeoutExpired):
+            demo.run_pytest(tmp_path, "-p", "no:cacheprovider", "-p", "no:timeout")
+
+    def test_evict_repo_modules_skips_sibling_dirs(self, demo, tmp_path, monkeypatch):
+        """Test that only modules under the repo itself are evicted."""
+        inside, sibling = types.ModuleType("inside"), types.ModuleType("sibling")
+        inside.__file__ = str(tmp_path / "repo" / "calc.py")
+        sibling.__file__ = str(tmp_path / "repo2" / "calc.py")
+        monkeypatch.setitem(sys.modules, "inside", inside)
+        monkeypatch.setitem(sys.modules, "sibling", sibling)
+
+        demo._evict_repo_modules(str(tmp_path / "repo"))
+
+        assert "inside" not in sys.modules
+        assert sys.modules["sibling"] is sibling
@@ -0,0 +1,44 @@
+"""Tests for the smart file cache module."""
+
+import pytest
+
+from rfsn_controller.smart_file_cache import (
+    clear_all_caches,
+    get_cache_stats,
+    get_file_cache,
+    reset_file_cache,
+    smart_read_file,
+)
+
+
+@pytest.fixture(autouse=True)
+def fresh_file_cache():
+    """Give each test its own global file cache."""
+    reset_file_cache()
+    yield
+    reset_file_cache()
+
+
+class TestGlobalFileCache:
+    """Test the process-wide file cache helpers."""
+
+    def test_get_file_cache_is_a_singleton(self):
+        """Test that repeated calls return the same cache."""
+        assert get_file_cache() is get_file_cache()
+
+    def test_clear_all_caches_empties_the_global_cache(self, tmp_path):
+        """Test that clear_all_caches drops every cached file."""
+        path = tmp_path / "a.py"
+        path.write_text("x = 1\n")
+        assert smart_read_file(str(path)) == "x = 1\n"
+        assert get_cache_stats()["file_cache"]["entries"] == 1
+
+        clear_all_caches()
+
+        assert get_cache_stats()["file_cache"]["entries"] == 0
+
+    def test_clear_all_caches_without_a_cache(self):
+        """Test that clearing before any read is a no-op."""
+        clear_all_caches()
+
+        assert get_cache_stats()["file_cache"]["entries"] == 0
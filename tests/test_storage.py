@@ -0,0 +1,46 @@
+"""Tests for storage backends."""
+
+import os
+
+import pytest
+
+from rfsn_controller.storage import LocalStore, StorageError, _smart_copy, make_store
+
+
+class TestLocalStore:
+    """Test suite for LocalStore publishing."""
+
+    def test_put_dir_copies_tree_into_existing_dest(self, tmp_path):
+        """Test that put_dir merges the source tree into the destination."""
+        src = tmp_path / "src"
+        (src / "sub" / "deep").mkdir(parents=True)
+        (src / "a.txt").write_text("alpha")
+        (src / "sub" / "deep" / "b.bin").write_bytes(b"\x00\x01" * 4096)
+        dest = tmp_path / "dest"
+        dest.mkdir()
+        (dest / "keep.txt").write_text("kept")
+
+        result = LocalStore().put_dir(str(src), str(dest))
+
+        assert result.backend == "local"
+        assert result.destination == os.path.abspath(dest)
+        assert (dest / "a.txt").read_text() == "alpha"
+        assert (dest / "sub" / "deep" / "b.bin").read_bytes() == b"\x00\x01" * 4096
+        assert (dest / "keep.txt").read_text() == "kept"
+
+    def test_smart_copy_preserves_content_and_mtime(self, tmp_path):
+        """Test that _smart_copy keeps copy2 semantics."""
+        src = tmp_path / "src.txt"
+        src.write_text("payload")
+        os.utime(src, (1_000_000, 1_000_000))
+        dst = tmp_path / "dst.txt"
+
+        assert _smart_copy(str(src), str(dst)) == str(dst)
+
+        assert dst.read_text() == "payload"
+        assert os.stat(dst).st_mtime == 1_000_000
+
+    def test_make_store_requires_local_dir(self):
+        """Test that the local backend requires a directory."""
+        with pytest.raises(StorageError):
+            make_store("local")
@@ -0,0 +1,203 @@
+"""Tests for the web UI FastAPI server (ui/server.py)."""
+
+import asyncio
+import importlib.util
+import json
+import os
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+SERVER_PATH = Path(__file__).parent.parent / "ui" / "server.py"
+
+
+@pytest.fixture(scope="module")
+def server():
+    spec = importlib.util.spec_from_file_location("rfsn_ui_server", SERVER_PATH)
+    assert spec is not None and spec.loader is not None
+    module = importlib.util.module_from_spec(spec)
+    # Dataclasses resolve their module through sys.modules while executing
+    sys.modules[spec.name] = module
+    try:
+        spec.loader.exec_module(module)
+        yield module
+    finally:
+        sys.modules.pop(spec.name, None)
+
+
+class TestPrecompressedAssets:
+    """Test Accept-Encoding negotiation for precompressed UI assets."""
+
+    @pytest.mark.parametrize(
+        ("header", "expected"),
+        [
+            ("", set()),
+            ("gzip, deflate, br", {"br", "gzip"}),
+            ("gzip, br;q=0", {"gzip"}),
+            ("BR;Q=0.5, gzip;q=0.0", {"br"}),
+            ("*", {"br", "gzip"}),
+            ("*;q=0.1, br;q=0", {"gzip"}),
+            ("identity", set()),
+            ("br;q=bogus, gzip", {"gzip"}),
+        ],
+    )
+    def test_accepted_encodings(self, server, header, expected):
+        """Test that codings are parsed as tokens with q-values."""
+        assert server._accepted_encodings(header) == expected
+
+    def test_refused_coding_is_not_served(self, server, tmp_path):
+        """Test that br;q=0 never gets the .br sibling."""
+        path = tmp_path / "app.js"
+        path.write_text("console.log(1);\n")
+        (tmp_path / "app.js.br").write_bytes(b"br-bytes")
+        (tmp_path / "app.js.gz").write_bytes(b"gz-bytes")
+        source_mtime = path.stat().st_mtime
+        for suffix in (".br", ".gz"):
+            os.utime(tmp_path / f"app.js{suffix}", (source_mtime + 1, source_mtime + 1))
+
+        refused = server._file_response(str(path), "br;q=0, gzip")
+        preferred = server._file_response(str(path), "gzip, br")
+        plain = server._file_response(str(path), "br;q=0")
+
+        assert refused.path == str(path) + ".gz"
+        assert refused.headers["content-encoding"] == "gzip"
+        assert preferred.path == str(path) + ".br"
+        assert plain.path == str(path)
+        assert "content-encoding" not in plain.headers
+
+
+START_REQUEST = {
+    "repoUrl": "https://github.com/example/project",
+    "problemStatement": "add() subtracts",
+    "llmApiKey": "sk-test",
+}
+
+
+@pytest.fixture
+def client(server, monkeypatch):
+    """TestClient whose agent runs instantly and pushes one batched update."""
+
+    async def fake_agent(task_id, request):
+        # Hold the update until the test's WebSocket is listening
+        for _ in range(200):
+            if task_id in server.manager.active_connections:
+                break
+            await asyncio.sleep(0.01)
+        await server.manager.send_batch(task_id, [
+            server.PHASE_FRAMES[0],
+            {"type": "progress", "progress": 50.0},
+        ])
+
+    monkeypatch.setattr(server, "RFSN_AVAILABLE", False)
+    monkeypatch.setattr(server, "run_mock_agent", fake_agent)
+    monkeypatch.setattr(server, "WS_HEARTBEAT_SECONDS", 0.05)
+    monkeypatch.setattr(server, "running_tasks", {})
+    with TestClient(server.app) as test_client:
+        yield test_client
+
+
+def _receive_until_complete(websocket, receive):
+    """Collect frames up to the "complete" message, dropping log lines."""
+    frames = []
+    while True:
+        frame = receive(websocket)
+        if isinstance(frame, dict) and frame["type"] == "log":
+            continue
+        frames.append(frame)
+        if isinstance(frame, dict) and frame["type"] == "complete":
+            return frames
+
+
+class TestStaticFiles:
+    """Test that the UI is served independently of the working directory."""
+
+    def test_index_and_assets_from_another_cwd(self, server, client, tmp_path, monkeypatch):
+        """Test that / and static assets resolve next to server.py."""
+        monkeypatch.chdir(tmp_path)
+
+        index = client.get("/")
+        asset = client.get("/app.js")
+
+        assert index.status_code == 200
+        assert index.text == (SERVER_PATH.parent / "index.html").read_text()
+        assert asset.status_code == 200
+        assert asset.text == (SERVER_PATH.parent / "app.js").read_text()
+
+
+class TestApi:
+    """Test the REST endpoints."""
+
+    def test_start_then_status(self, server, client):
+        """Test that a started task is queryable and keeps no credentials."""
+        response = client.post("/api/start", json=START_REQUEST)
+
+        assert response.status_code == 200
+        body = response.json()
+        assert body["status"] == "started"
+        task_id = body["task_id"]
+        assert not hasattr(server.running_tasks[task_id].config, "llmApiKey")
+
+        status = client.get(f"/api/status/{task_id}").json()
+        assert status["task_id"] == task_id
+        assert status["status"] in ("running", "completed")
+        assert set(status) == {
+            "task_id", "status", "phase", "progress", "steps_completed", "patches_tried", "elapsed_time",
+        }
+
+    def test_status_of_unknown_task_is_404(self, client):
+        """Test that an unknown task id is reported as not found."""
+        assert client.get("/api/status/missing").status_code == 404
+
+    def test_events_stream_ends_with_the_task(self, server, client):
+        """Test that the SSE stream closes once the task has finished."""
+        server.running_tasks["done"] = server.TaskState(
+            config=server.AgentConfig("swebench_lite", 50, 30), status="completed",
+        )
+
+        response = client.get("/api/events/done")
+
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = [line for line in response.text.splitlines() if line.startswith("data: ")]
+        assert len(events) == 1
+        assert json.loads(events[0][len("data: "):])["status"] == "completed"
+
+
+class TestWebSocket:
+    """Test live updates over /ws in both wire formats."""
+
+    def test_json_frames(self, client):
+        """Test that the default encoding sends JSON text, batches as arrays."""
+        task_id = client.post("/api/start", json=START_REQUEST).json()["task_id"]
+
+        with client.websocket_connect(f"/ws/{task_id}") as websocket:
+            frames = _receive_until_complete(websocket, lambda ws: ws.receive_json())
+
+        assert frames[0]["type"] == "connected"
+        assert frames[1] == [{"type": "phase", "phase": "INGEST"}, {"type": "progress", "progress": 50.0}]
+        assert frames[-1]["success"] is True
+
+    def test_msgpack_request_without_msgpack_falls_back_to_json(self, server, client, monkeypatch):
+        """Test that ?encoding=msgpack still gets JSON text when msgpack is missing."""
+        monkeypatch.setattr(server, "HAS_MSGPACK", False)
+        task_id = client.post("/api/start", json=START_REQUEST).json()["task_id"]
+
+        with client.websocket_connect(f"/ws/{task_id}?encoding=msgpack") as websocket:
+            frames = _receive_until_complete(websocket, lambda ws: ws.receive_json())
+
+        assert frames[0]["type"] == "connected"
+
+    def test_msgpack_frames(self, server, client):
+        """Test that ?encoding=msgpack switches to binary msgpack frames."""
+        msgpack = pytest.importorskip("msgpack")
+        if not server.HAS_MSGPACK:
+            pytest.skip("server loaded without msgpack")
+        task_id = client.post("/api/start", json=START_REQUEST).json()["task_id"]
+
+        with client.websocket_connect(f"/ws/{task_id}?encoding=msgpack") as websocket:
+            frames = _receive_until_complete(websocket, lambda ws: msgpack.unpackb(ws.receive_bytes()))
+
+        assert frames[0]["type"] == "connected"
+        assert frames[1] == [{"type": "phase", "phase": "INGEST"}, {"type": "progress", "progress": 50.0}]
+        assert frames[-1]["type"] == "complete"
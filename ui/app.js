@@ -88,6 +88,7 @@ class RFSNApp {
             profile: document.getElementById('profile').value,
             maxSteps: parseInt(document.getElementById('maxSteps').value),
             maxTime: parseInt(document.getElementById('maxTime').value),
+            wsEncoding: document.getElementById('wsEncoding').value,
             
             // Localization layers
             useTrace: document.getElementById('useTrace').checked,
@@ -146,6 +147,7 @@ class RFSNApp {
             profile: 'value',
             maxSteps: 'value',
             maxTime: 'value',
+            wsEncoding: 'value',
             useTrace: 'checked',
             useRipgrep: 'checked',
             useSymbols: 'checked',
@@ -285,15 +287,27 @@ class RFSNApp {
     
     connectWebSocket(taskId) {
         try {
-            this.websocket = new WebSocket(`ws://localhost:8000/ws/${taskId}`);
+            // Binary msgpack frames only when explicitly selected
+            const useMsgpack = this.config.wsEncoding === 'msgpack' && typeof MessagePack !== 'undefined';
+            const query = useMsgpack ? '?encoding=msgpack' : '';
+            this.websocket = new WebSocket(`ws://localhost:8000/ws/${taskId}${query}`);
+            this.websocket.binaryType = 'arraybuffer';
             
             this.websocket.onopen = () => {
                 this.addLog('success', 'Connected to live updates');
             };
             
             this.websocket.onmessage = (event) => {
-                const data = JSON.parse(event.data);
-                this.handleWebSocketMessage(data);
+                // The server falls back to JSON text if it lacks msgpack
+                const data = typeof event.data === 'string'
+                    ? JSON.parse(event.data)
+                    : MessagePack.decode(new Uint8Array(event.data));
+                // Batched frames carry an array of messages
+                if (Array.isArray(data)) {
+                    data.forEach((message) => this.handleWebSocketMessage(message));
+                } else {
+                    this.handleWebSocketMessage(data);
+                }
             };
             
             this.websocket.onerror = (error) => {
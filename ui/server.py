@@ -8,32 +8,88 @@ from __future__ import annotations
 
 import asyncio
 import json
+import mimetypes
+import os
+import time
 import uuid
-from datetime import datetime
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, Optional
 
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException
+from fastapi import FastAPI, HTTPException, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
 from pydantic import BaseModel
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.staticfiles import NotModifiedResponse
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+try:
+    import msgpack
+    HAS_MSGPACK = True
+except ImportError:
+    HAS_MSGPACK = False
+
+try:
+    from redis.asyncio import Redis
+    HAS_REDIS = True
+except ImportError:
+    HAS_REDIS = False
 
 # Import RFSN components
 import sys
+
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 try:
+    from agent.profiles import load_profile
     from eval.run import EvalConfig, EvalRunner, SWEBenchTask
     from localize import LocalizationConfig
-    from agent.profiles import load_profile
     RFSN_AVAILABLE = True
 except ImportError:
     RFSN_AVAILABLE = False
     print("Warning: RFSN components not available, running in mock mode")
 
 
-app = FastAPI(title="RFSN SWE-Bench Killer API", version="0.4.0")
+# Serialize responses with orjson when available, stdlib json otherwise
+DefaultResponse: type[JSONResponse]
+if HAS_ORJSON:
+    from fastapi.responses import ORJSONResponse
+
+    class UTCORJSONResponse(ORJSONResponse):
+        """ORJSONResponse that serializes naive datetimes as UTC."""
+
+        def render(self, content) -> bytes:
+            return orjson.dumps(content, option=orjson.OPT_NAIVE_UTC)
+
+    DefaultResponse = UTCORJSONResponse
+else:
+    DefaultResponse = JSONResponse
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    await agent_pool.shutdown()
+    if bridge is not None:
+        await bridge.close()
+
+
+app = FastAPI(
+    title="RFSN SWE-Bench Killer API",
+    version="0.4.0",
+    default_response_class=DefaultResponse,
+    lifespan=lifespan,
+)
 
 # CORS middleware
 app.add_middleware(
@@ -44,23 +100,104 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+def _encode(payload: dict | list) -> str:
+    """Encode a WebSocket payload as compact JSON text."""
+    if HAS_ORJSON:
+        return orjson.dumps(payload, option=orjson.OPT_NAIVE_UTC).decode()
+    return json.dumps(payload, separators=(",", ":"), ensure_ascii=False)
+
+
+def _decode(text: str) -> dict | list:
+    """Decode a JSON text frame produced by _encode()."""
+    return orjson.loads(text) if HAS_ORJSON else json.loads(text)
+
+
+def _pack(payload: dict | list) -> bytes:
+    """Encode a WebSocket payload as msgpack (requires HAS_MSGPACK)."""
+    return msgpack.packb(payload, use_bin_type=True)
+
+
+@dataclass(frozen=True, slots=True)
+class Frame:
+    """A static message encoded once for both wire formats."""
+
+    text: str
+    # Empty without msgpack; only msgpack clients read it, and those need it
+    packed: bytes
+
+    @classmethod
+    def of(cls, payload: dict) -> Frame:
+        return cls(_encode(payload), _pack(payload) if HAS_MSGPACK else b"")
+
+
 # WebSocket connection manager
 class ConnectionManager:
     def __init__(self):
-        self.active_connections: Dict[str, WebSocket] = {}
+        self.active_connections: dict[str, WebSocket] = {}
+        # Task IDs whose client asked for binary msgpack frames
+        self.msgpack_clients: set[str] = set()
 
-    async def connect(self, task_id: str, websocket: WebSocket):
+    async def connect(self, task_id: str, websocket: WebSocket, use_msgpack: bool = False):
         await websocket.accept()
         self.active_connections[task_id] = websocket
+        if use_msgpack and HAS_MSGPACK:
+            self.msgpack_clients.add(task_id)
+        else:
+            self.msgpack_clients.discard(task_id)
 
     def disconnect(self, task_id: str):
         if task_id in self.active_connections:
             del self.active_connections[task_id]
+        self.msgpack_clients.discard(task_id)
 
     async def send_message(self, task_id: str, message: dict):
+        """Send to the task's client, via Redis when workers share tasks."""
+        if bridge is not None:
+            await bridge.publish(task_id, _encode(message))
+        else:
+            await self.send_direct(task_id, message)
+
+    async def send_direct(self, task_id: str, message: dict):
+        """Send to a client connected to this worker only."""
+        if task_id in self.msgpack_clients:
+            await self._send(task_id, _pack(message))
+        else:
+            await self._send(task_id, _encode(message))
+
+    async def forward(self, task_id: str, text: str):
+        """Deliver a JSON frame received from Redis in the client's encoding."""
+        if task_id in self.msgpack_clients:
+            await self._send(task_id, _pack(_decode(text)))
+        else:
+            await self._send(task_id, text)
+
+    async def send_batch(self, task_id: str, messages: list[dict | Frame]):
+        """Send several messages as one array frame.
+
+        Messages may be dicts or pre-encoded Frames.
+        """
+        if not messages:
+            return
+        if task_id in self.msgpack_clients and bridge is None:
+            header = msgpack.Packer().pack_array_header(len(messages))
+            packed = (m.packed if isinstance(m, Frame) else _pack(m) for m in messages)
+            await self._send(task_id, header + b"".join(packed))
+            return
+        text = "[" + ",".join(m.text if isinstance(m, Frame) else _encode(m) for m in messages) + "]"
+        if bridge is not None:
+            await bridge.publish(task_id, text)
+        else:
+            await self._send(task_id, text)
+
+    async def _send(self, task_id: str, data: str | bytes):
+        # Text frames for JSON, so plain clients can keep JSON.parse(event.data)
         if task_id in self.active_connections:
+            websocket = self.active_connections[task_id]
             try:
-                await self.active_connections[task_id].send_json(message)
+                if isinstance(data, bytes):
+                    await websocket.send_bytes(data)
+                else:
+                    await websocket.send_text(data)
             except Exception as e:
                 print(f"Error sending message to {task_id}: {e}")
                 self.disconnect(task_id)
@@ -68,8 +205,125 @@ class ConnectionManager:
 
 manager = ConnectionManager()
 
+# Agent phases, in order
+PHASES = ("INGEST", "LOCALIZE", "PLAN", "PATCH", "TEST", "DIAGNOSE", "FINALIZE")
+
+# Static per-phase messages, encoded once at import
+PHASE_FRAMES = tuple(Frame.of({"type": "phase", "phase": phase}) for phase in PHASES)
+LOG_FRAMES = tuple(
+    Frame.of({"type": "log", "level": "info", "message": f"Executing phase: {phase}"})
+    for phase in PHASES
+)
+
 # Running tasks
-running_tasks: Dict[str, dict] = {}
+@dataclass(frozen=True, slots=True)
+class AgentConfig:
+    """Settings of a task kept for its lifetime; secrets are not retained."""
+
+    profile: str
+    max_steps: int
+    max_time: int
+
+    @classmethod
+    def from_request(cls, request: StartRequest) -> AgentConfig:
+        return cls(request.profile, request.maxSteps, request.maxTime)
+
+
+@dataclass(slots=True)
+class TaskState:
+    """Progress of a single agent task."""
+
+    config: AgentConfig
+    status: str = "running"
+    phase: str = "INGEST"
+    progress: float = 0.0
+    steps_completed: int = 0
+    patches_tried: int = 0
+    start_monotonic: float = field(default_factory=time.monotonic)
+    # Wall-clock start, for elapsed time computed by other workers
+    started_at: float = field(default_factory=time.time)
+
+
+running_tasks: dict[str, TaskState] = {}
+
+
+# Shared task registry, so `uvicorn --workers N` can serve any task
+REDIS_URL = os.environ.get("RFSN_UI_REDIS_URL")
+TASK_TTL_SECONDS = 24 * 60 * 60
+
+
+class RedisBridge:
+    """Mirrors task state and WebSocket frames through Redis.
+
+    The worker running a task writes its state to the ``task:<id>`` hash
+    and publishes its frames on ``task:<id>:events``; any worker can then
+    answer status requests and feed its own WebSocket clients.
+    """
+
+    def __init__(self, url: str):
+        self.redis = Redis.from_url(url, decode_responses=True)
+
+    async def save_state(self, task_id: str, task: TaskState) -> None:
+        key = f"task:{task_id}"
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.hset(key, mapping={
+                "status": task.status,
+                "phase": task.phase,
+                "progress": task.progress,
+                "steps_completed": task.steps_completed,
+                "patches_tried": task.patches_tried,
+                "started_at": task.started_at,
+            })
+            pipe.expire(key, TASK_TTL_SECONDS)
+            await pipe.execute()
+
+    async def load_status(self, task_id: str) -> dict | None:
+        """Status fields matching StatusResponse, or None if unknown."""
+        data = await self.redis.hgetall(f"task:{task_id}")
+        if not data:
+            return None
+        return {
+            "task_id": task_id,
+            "status": data["status"],
+            "phase": data["phase"],
+            "progress": float(data["progress"]),
+            "steps_completed": int(data["steps_completed"]),
+            "patches_tried": int(data["patches_tried"]),
+            "elapsed_time": time.time() - float(data["started_at"]),
+        }
+
+    async def publish(self, task_id: str, text: str) -> None:
+        await self.redis.publish(f"task:{task_id}:events", text)
+
+    async def frames(self, task_id: str) -> AsyncIterator[str]:
+        """Yield JSON frames published for ``task_id`` from now on."""
+        channel = f"task:{task_id}:events"
+        pubsub = self.redis.pubsub()
+        await pubsub.subscribe(channel)
+        try:
+            async for message in pubsub.listen():
+                if message["type"] == "message":
+                    yield message["data"]
+        finally:
+            await pubsub.unsubscribe(channel)
+            await pubsub.aclose()
+
+    async def close(self) -> None:
+        await self.redis.aclose()
+
+
+bridge: RedisBridge | None = None
+if REDIS_URL:
+    if HAS_REDIS:
+        bridge = RedisBridge(REDIS_URL)
+    else:
+        print("Warning: RFSN_UI_REDIS_URL is set but redis is not installed; tasks stay per-process")
+
+
+async def _save_state(task_id: str) -> None:
+    """Publish a local task's state for other workers (no-op without Redis)."""
+    if bridge is not None:
+        await bridge.save_state(task_id, running_tasks[task_id])
 
 
 # Request/Response models
@@ -77,8 +331,8 @@ class StartRequest(BaseModel):
     repoUrl: str
     repoBranch: str = "main"
     problemStatement: str
-    githubToken: Optional[str] = None
-    githubUsername: Optional[str] = None
+    githubToken: str | None = None
+    githubUsername: str | None = None
     createPR: bool = False
     commitChanges: bool = True
     llmProvider: str = "deepseek"
@@ -113,10 +367,89 @@ class StatusResponse(BaseModel):
     elapsed_time: float
 
 
+# Precompressed siblings (built by scripts/precompress_ui.py), best first
+PRECOMPRESSED_ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+
+@lru_cache(maxsize=64)
+def _accepted_encodings(accept_encoding: str) -> frozenset[str]:
+    """Precompressed codings an ``Accept-Encoding`` header allows (q > 0).
+
+    A coding listed with ``q=0`` is refused even when ``*`` would allow it.
+    Browsers send only a handful of distinct headers, so parses are cached.
+    """
+    qvalues: dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        coding, *params = item.split(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        qvalues[coding] = q
+    wildcard = qvalues.get("*", 0.0)
+    return frozenset(
+        encoding for encoding, _ in PRECOMPRESSED_ENCODINGS
+        if qvalues.get(encoding, wildcard) > 0
+    )
+
+
+def _file_response(path: str, accept_encoding: str, stat_result: os.stat_result | None = None) -> FileResponse:
+    """Serve ``path``, or its precompressed sibling if the client accepts it.
+
+    A sibling older than the source file is treated as stale and ignored.
+    The stat is passed on to FileResponse, which would otherwise repeat it
+    in a worker thread.
+    """
+    if stat_result is None:
+        stat_result = os.stat(path)
+    accepted = _accepted_encodings(accept_encoding)
+    if accepted:
+        source_mtime = stat_result.st_mtime
+        for encoding, suffix in PRECOMPRESSED_ENCODINGS:
+            if encoding not in accepted:
+                continue
+            try:
+                encoded_stat = os.stat(path + suffix)
+            except OSError:
+                continue
+            if encoded_stat.st_mtime >= source_mtime:
+                return FileResponse(
+                    path + suffix,
+                    stat_result=encoded_stat,
+                    media_type=mimetypes.guess_type(path)[0] or "text/plain",
+                    headers={"Content-Encoding": encoding, "Vary": "Accept-Encoding"},
+                )
+    return FileResponse(path, stat_result=stat_result)
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """StaticFiles that prefers precompressed ``.br``/``.gz`` siblings."""
+
+    def file_response(self, full_path, stat_result, scope, status_code: int = 200) -> Response:
+        request_headers = Headers(scope=scope)
+        response = _file_response(str(full_path), request_headers.get("accept-encoding", ""), stat_result)
+        response.status_code = status_code
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
+
+
+# Resolved from this file so the server works from any working directory
+UI_DIR = Path(__file__).parent
+INDEX_PATH = str(UI_DIR / "index.html")
+
+
 @app.get("/")
-async def root():
+async def root(request: Request):
     """Serve the main UI."""
-    return FileResponse("ui/index.html")
+    return _file_response(INDEX_PATH, request.headers.get("accept-encoding", ""))
 
 
 @app.get("/api/health")
@@ -129,97 +462,211 @@ async def health():
     }
 
 
-@app.post("/api/start", response_model=StartResponse)
+# Agent runs are queued and drained by a fixed number of workers
+MAX_CONCURRENT_AGENTS = min(os.cpu_count() or 1, 8)
+
+
+class AgentPool:
+    """Bounded set of workers that execute queued agent tasks."""
+
+    def __init__(self, size: int):
+        self.size = size
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._queue: asyncio.Queue[tuple[str, StartRequest]] | None = None
+        self._workers: list[asyncio.Task] = []
+
+    def submit(self, task_id: str, request: StartRequest) -> None:
+        """Queue a task, starting the workers on the current loop if needed."""
+        loop = asyncio.get_running_loop()
+        queue = self._queue
+        if self._loop is not loop or queue is None:
+            self._loop = loop
+            self._queue = queue = asyncio.Queue()
+            self._workers = [asyncio.create_task(self._worker(queue)) for _ in range(self.size)]
+        queue.put_nowait((task_id, request))
+
+    async def _worker(self, queue: asyncio.Queue[tuple[str, StartRequest]]) -> None:
+        while True:
+            task_id, request = await queue.get()
+            try:
+                # Skip tasks stopped while they were still waiting in the queue
+                task = running_tasks.get(task_id)
+                if task is not None and task.status == "running":
+                    await run_agent_task(task_id, request)
+            finally:
+                queue.task_done()
+
+    async def shutdown(self) -> None:
+        """Cancel the workers; queued tasks are dropped."""
+        workers, self._workers = self._workers, []
+        self._loop = self._queue = None
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+
+agent_pool = AgentPool(MAX_CONCURRENT_AGENTS)
+
+
+# Responses below are built as plain dicts and returned directly; the
+# models are only declared for the OpenAPI schema, not re-validated.
+@app.post("/api/start", responses={200: {"model": StartResponse}})
 async def start_agent(request: StartRequest):
     """Start the RFSN agent with given configuration."""
     
     # Generate task ID
     task_id = str(uuid.uuid4())[:8]
     
-    # Store task info
-    running_tasks[task_id] = {
-        "config": request.dict(),
-        "status": "running",
-        "phase": "INGEST",
-        "progress": 0.0,
-        "steps_completed": 0,
-        "patches_tried": 0,
-        "start_time": datetime.now(),
-    }
+    # Store task info; credentials stay on the request, which is dropped once the agent runs
+    running_tasks[task_id] = TaskState(config=AgentConfig.from_request(request))
+    await _save_state(task_id)
     
-    # Start agent in background
-    asyncio.create_task(run_agent_task(task_id, request))
+    # Queue agent for the worker pool
+    agent_pool.submit(task_id, request)
     
-    return StartResponse(
-        task_id=task_id,
-        status="started",
-        message=f"Agent started with task ID: {task_id}",
-    )
+    return DefaultResponse({
+        "task_id": task_id,
+        "status": "started",
+        "message": f"Agent started with task ID: {task_id}",
+    })
 
 
 @app.post("/api/stop")
 async def stop_agent():
     """Stop the running agent."""
     # In a real implementation, this would signal the agent to stop
+    # With Redis, this only reaches tasks running on this worker
     for task_id in list(running_tasks.keys()):
-        running_tasks[task_id]["status"] = "stopped"
+        running_tasks[task_id].status = "stopped"
+        await _save_state(task_id)
     
     return {"status": "stopped", "message": "Stop signal sent to all agents"}
 
 
-@app.get("/api/status/{task_id}", response_model=StatusResponse)
+def _status_payload(task_id: str, task: TaskState) -> dict:
+    """Status fields matching StatusResponse."""
+    return {
+        "task_id": task_id,
+        "status": task.status,
+        "phase": task.phase,
+        "progress": task.progress,
+        "steps_completed": task.steps_completed,
+        "patches_tried": task.patches_tried,
+        "elapsed_time": time.monotonic() - task.start_monotonic,
+    }
+
+
+async def _lookup_status(task_id: str) -> dict | None:
+    """Status of a task on this worker, or on any worker via Redis."""
+    task = running_tasks.get(task_id)
+    if task is not None:
+        return _status_payload(task_id, task)
+    if bridge is not None:
+        return await bridge.load_status(task_id)
+    return None
+
+
+@app.get("/api/status/{task_id}", responses={200: {"model": StatusResponse}})
 async def get_status(task_id: str):
     """Get the status of a running task."""
-    if task_id not in running_tasks:
+    payload = await _lookup_status(task_id)
+    if payload is None:
         raise HTTPException(status_code=404, detail="Task not found")
     
-    task = running_tasks[task_id]
-    elapsed = (datetime.now() - task["start_time"]).total_seconds()
-    
-    return StatusResponse(
-        task_id=task_id,
-        status=task["status"],
-        phase=task["phase"],
-        progress=task["progress"],
-        steps_completed=task["steps_completed"],
-        patches_tried=task["patches_tried"],
-        elapsed_time=elapsed,
+    return DefaultResponse(payload)
+
+
+# Seconds between progress events pushed on /api/events
+SSE_INTERVAL_SECONDS = 0.5
+
+
+@app.get("/api/events/{task_id}")
+async def stream_events(task_id: str):
+    """Server-Sent Events stream of task status, for clients that only read."""
+    payload = await _lookup_status(task_id)
+    if payload is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+
+    async def event_stream():
+        status: dict | None = payload
+        while status is not None:
+            yield f"data: {_encode(status)}\n\n"
+            if status["status"] != "running":
+                break
+            await asyncio.sleep(SSE_INTERVAL_SECONDS)
+            status = await _lookup_status(task_id)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"},
     )
 
 
+# Seconds between heartbeats sent on an otherwise idle WebSocket
+WS_HEARTBEAT_SECONDS = 15.0
+
+
 @app.websocket("/ws/{task_id}")
 async def websocket_endpoint(websocket: WebSocket, task_id: str):
-    """WebSocket endpoint for real-time updates."""
-    await manager.connect(task_id, websocket)
-    
+    """WebSocket endpoint for real-time updates.
+
+    Frames are JSON text by default; ``?encoding=msgpack`` switches the
+    connection to binary msgpack frames when the server has msgpack.
+    """
+    use_msgpack = websocket.query_params.get("encoding") == "msgpack"
+    await manager.connect(task_id, websocket, use_msgpack)
+
+    async def receiver():
+        # Block until the client sends something or disconnects
+        async for _data in websocket.iter_text():
+            pass  # Handle client messages if needed
+
+    async def heartbeat():
+        # Keep connection alive while the task is still running
+        while (status := await _lookup_status(task_id)) is not None and status["status"] != "completed":
+            await asyncio.sleep(WS_HEARTBEAT_SECONDS)
+            await manager.send_direct(task_id, {"type": "heartbeat"})
+
+    async def forwarder(relay: RedisBridge):
+        # Relay frames published by whichever worker runs the task
+        async for text in relay.frames(task_id):
+            await manager.forward(task_id, text)
+
+    workers: set[asyncio.Task] = set()
     try:
         # Send initial status
-        if task_id in running_tasks:
-            await manager.send_message(task_id, {
+        if await _lookup_status(task_id) is not None:
+            await manager.send_direct(task_id, {
                 "type": "connected",
                 "task_id": task_id,
                 "message": "Connected to live updates",
             })
-        
-        # Keep connection alive
-        while True:
-            # Wait for messages (client can send commands)
-            try:
-                data = await asyncio.wait_for(websocket.receive_text(), timeout=1.0)
-                # Handle client messages if needed
-            except asyncio.TimeoutError:
-                # Send heartbeat
-                await manager.send_message(task_id, {"type": "heartbeat"})
-            
-            # Check if task is still running
-            if task_id not in running_tasks or running_tasks[task_id]["status"] == "completed":
-                break
-                
+
+        # Close on whichever finishes first: client disconnect or task completion
+        keepalive = asyncio.create_task(heartbeat())
+        workers = {asyncio.create_task(receiver()), keepalive}
+        if bridge is not None:
+            workers.add(asyncio.create_task(forwarder(bridge)))
+        done, _ = await asyncio.wait(workers, return_when=asyncio.FIRST_COMPLETED)
+        for worker in done:
+            worker.result()
+        if keepalive in done:
+            # Unregister first so no sender writes to the closing socket
+            manager.disconnect(task_id)
+            await websocket.close()
+
     except WebSocketDisconnect:
-        manager.disconnect(task_id)
+        pass
     except Exception as e:
         print(f"WebSocket error for {task_id}: {e}")
+    finally:
         manager.disconnect(task_id)
+        for worker in workers:
+            worker.cancel()
+        if workers:
+            # wait(), unlike gather(), never re-raises a worker's CancelledError
+            await asyncio.wait(workers)
 
 
 async def run_agent_task(task_id: str, config: StartRequest):
@@ -241,20 +688,23 @@ async def run_agent_task(task_id: str, config: StartRequest):
             await run_mock_agent(task_id, config)
         
         # Mark as completed
-        running_tasks[task_id]["status"] = "completed"
+        running_tasks[task_id].status = "completed"
         await manager.send_message(task_id, {
             "type": "complete",
             "success": True,
-            "time_taken": (datetime.now() - running_tasks[task_id]["start_time"]).total_seconds(),
+            "time_taken": time.monotonic() - running_tasks[task_id].start_monotonic,
         })
+        # Published after the frame, so remote sockets don't close before it
+        await _save_state(task_id)
         
     except Exception as e:
         print(f"Error running agent task {task_id}: {e}")
-        running_tasks[task_id]["status"] = "error"
+        running_tasks[task_id].status = "error"
         await manager.send_message(task_id, {
             "type": "error",
             "message": str(e),
         })
+        await _save_state(task_id)
 
 
 async def run_real_agent(task_id: str, config: StartRequest):
@@ -284,23 +734,21 @@ async def run_real_agent(task_id: str, config: StartRequest):
     # This is a simplified version - real implementation would need
     # to hook into the agent loop for progress updates
     
-    phases = ["INGEST", "LOCALIZE", "PLAN", "PATCH", "TEST", "DIAGNOSE", "FINALIZE"]
-    
-    for i, phase in enumerate(phases):
-        running_tasks[task_id]["phase"] = phase
-        running_tasks[task_id]["progress"] = (i + 1) / len(phases) * 100
+    state = running_tasks[task_id]
+    for i, phase in enumerate(PHASES):
+        state.phase = phase
+        state.progress = (i + 1) / len(PHASES) * 100
+        await _save_state(task_id)
         
-        await manager.send_message(task_id, {
-            "type": "phase",
-            "phase": phase,
-        })
-        
-        await manager.send_message(task_id, {
-            "type": "progress",
-            "progress": (i + 1) / len(phases) * 100,
-            "current_step": i + 1,
-            "total_steps": len(phases),
-        })
+        await manager.send_batch(task_id, [
+            PHASE_FRAMES[i],
+            {
+                "type": "progress",
+                "progress": (i + 1) / len(PHASES) * 100,
+                "current_step": i + 1,
+                "total_steps": len(PHASES),
+            },
+        ])
         
         # Simulate work
         await asyncio.sleep(2)
@@ -309,35 +757,26 @@ async def run_real_agent(task_id: str, config: StartRequest):
 async def run_mock_agent(task_id: str, config: StartRequest):
     """Run a mock agent for demo purposes."""
     
-    phases = ["INGEST", "LOCALIZE", "PLAN", "PATCH", "TEST", "DIAGNOSE", "FINALIZE"]
-    
-    for i, phase in enumerate(phases):
+    state = running_tasks[task_id]
+    for i, phase in enumerate(PHASES):
         # Update task state
-        running_tasks[task_id]["phase"] = phase
-        running_tasks[task_id]["steps_completed"] = i + 1
-        running_tasks[task_id]["progress"] = (i + 1) / len(phases) * 100
+        state.phase = phase
+        state.steps_completed = i + 1
+        state.progress = (i + 1) / len(PHASES) * 100
+        await _save_state(task_id)
         
-        # Send phase update
-        await manager.send_message(task_id, {
-            "type": "phase",
-            "phase": phase,
-        })
-        
-        # Send log
-        await manager.send_message(task_id, {
-            "type": "log",
-            "level": "info",
-            "message": f"Executing phase: {phase}",
-        })
-        
-        # Send progress
-        await manager.send_message(task_id, {
-            "type": "progress",
-            "progress": (i + 1) / len(phases) * 100,
-            "current_step": i + 1,
-            "total_steps": len(phases),
-            "patches": i // 2,
-        })
+        # Send phase update, log and progress in one frame
+        await manager.send_batch(task_id, [
+            PHASE_FRAMES[i],
+            LOG_FRAMES[i],
+            {
+                "type": "progress",
+                "progress": (i + 1) / len(PHASES) * 100,
+                "current_step": i + 1,
+                "total_steps": len(PHASES),
+                "patches": i // 2,
+            },
+        ])
         
         # Simulate work
         await asyncio.sleep(3)
@@ -356,7 +795,8 @@ async def run_mock_agent(task_id: str, config: StartRequest):
                 "message": "Generated 3 patch candidates",
             })
         elif phase == "TEST":
-            running_tasks[task_id]["patches_tried"] += 1
+            state.patches_tried += 1
+            await _save_state(task_id)
             await manager.send_message(task_id, {
                 "type": "log",
                 "level": "success",
@@ -365,7 +805,7 @@ async def run_mock_agent(task_id: str, config: StartRequest):
 
 
 # Serve static files
-app.mount("/", StaticFiles(directory="ui", html=True), name="ui")
+app.mount("/", PrecompressedStaticFiles(directory=UI_DIR, html=True), name="ui")
 
 
 if __name__ == "__main__":
@@ -375,9 +815,18 @@ if __name__ == "__main__":
     print("📍 Server running at: http://localhost:8000")
     print("💡 Open http://localhost:8000 in your browser")
     
+    # Several workers only see each other's tasks through Redis
+    workers = int(os.environ.get("RFSN_UI_WORKERS", "1"))
+    if workers > 1 and bridge is None:
+        print("Warning: RFSN_UI_WORKERS > 1 requires RFSN_UI_REDIS_URL; using 1 worker")
+        workers = 1
+    
     uvicorn.run(
-        app,
+        "server:app" if workers > 1 else app,
         host="0.0.0.0",
         port=8000,
         log_level="info",
+        workers=workers,
+        # Workers re-import "server:app", so look for it next to this file
+        app_dir=str(UI_DIR),
     )